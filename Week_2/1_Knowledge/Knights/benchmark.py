@@ -0,0 +1,271 @@
+import itertools
+import os
+import tempfile
+import time
+
+from logic import *
+from logic_io import generate_corpus, iter_formulas, load_dimacs
+from puzzle import (AKnight, AKnave, BKnight, BKnave, CKnight, CKnave,
+                    knowledge0, knowledge1, knowledge2, knowledge3)
+from generator import generate_puzzle
+from solver import solve_batch, solve_puzzles
+
+SYMBOLS = [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]
+PUZZLES = [
+    ("Puzzle 0", knowledge0),
+    ("Puzzle 1", knowledge1),
+    ("Puzzle 2", knowledge2),
+    ("Puzzle 3", knowledge3)
+]
+
+
+def compare_pruning():
+    """
+    Compare models visited and time taken by model_check
+    with and without partial-model pruning on each puzzle.
+    """
+    print("Model checking: full enumeration vs. pruning")
+    print(f"  {'puzzle':<10}{'nodes':>8}{'pruned':>8}{'ms':>10}{'pruned ms':>11}")
+    for puzzle, knowledge in PUZZLES:
+        results = {}
+        for prune in (False, True):
+            stats = {}
+            start = time.perf_counter()
+            answers = [model_check(knowledge, symbol, prune=prune,
+                                   stats=stats, normalize=False)
+                       for symbol in SYMBOLS]
+            elapsed = (time.perf_counter() - start) * 1000
+            results[prune] = (answers, stats["nodes"], elapsed)
+
+        # Pruning must never change the answers
+        if results[False][0] != results[True][0]:
+            raise ValueError(f"{puzzle}: pruned answers differ")
+
+        print(f"  {puzzle:<10}{results[False][1]:>8}{results[True][1]:>8}"
+              f"{results[False][2]:>10.2f}{results[True][2]:>11.2f}")
+
+
+def compare_knowledge_base():
+    """
+    Compare answering every symbol query with repeated model_check
+    calls against a KnowledgeBase that enumerates its models once.
+    """
+    print("Entailment queries: model_check vs. KnowledgeBase")
+    print(f"  {'puzzle':<10}{'models':>8}{'ms':>10}{'kb ms':>10}")
+    for puzzle, knowledge in PUZZLES:
+        start = time.perf_counter()
+        expected = [model_check(knowledge, symbol) for symbol in SYMBOLS]
+        checked = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        kb = KnowledgeBase(knowledge)
+        answers = [kb.entails(symbol) for symbol in SYMBOLS]
+        cached = (time.perf_counter() - start) * 1000
+
+        if answers != expected:
+            raise ValueError(f"{puzzle}: knowledge base answers differ")
+
+        print(f"  {puzzle:<10}{len(kb.models):>8}{checked:>10.2f}{cached:>10.2f}")
+
+
+def size(sentence):
+    """
+    Return the number of nodes in the formula tree of `sentence`.
+    """
+    if isinstance(sentence, Symbol):
+        return 1
+    if isinstance(sentence, Not):
+        return 1 + size(sentence.operand)
+    if isinstance(sentence, And):
+        return 1 + sum(size(conjunct) for conjunct in sentence.conjuncts)
+    if isinstance(sentence, Or):
+        return 1 + sum(size(disjunct) for disjunct in sentence.disjuncts)
+    if isinstance(sentence, Implication):
+        return 1 + size(sentence.antecedent) + size(sentence.consequent)
+    return 1 + size(sentence.left) + size(sentence.right)
+
+
+def compare_simplification():
+    """
+    Compare formula size, time to evaluate every full model, and
+    model_check time before and after simplification.
+    """
+    print("Simplification: before vs. after")
+    print(f"  {'puzzle':<10}{'size':>6}{'after':>7}{'eval ms':>9}"
+          f"{'after':>7}{'check ms':>10}{'after':>7}")
+    names = [symbol.name for symbol in SYMBOLS]
+    models = [dict(zip(names, values)) for values in
+              itertools.product((True, False), repeat=len(names))]
+    for puzzle, knowledge in PUZZLES:
+        simplified = simplify(knowledge)
+        row = []
+        for sentence in (knowledge, simplified):
+            start = time.perf_counter()
+            truths = [sentence.evaluate(model) for model in models]
+            evaluated = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            answers = [model_check(sentence, symbol, normalize=False)
+                       for symbol in SYMBOLS]
+            checked = (time.perf_counter() - start) * 1000
+            row.append((size(sentence), truths, answers, evaluated, checked))
+
+        # Simplification must preserve meaning
+        if row[0][1] != row[1][1] or row[0][2] != row[1][2]:
+            raise ValueError(f"{puzzle}: simplified sentence differs")
+
+        print(f"  {puzzle:<10}{row[0][0]:>6}{row[1][0]:>7}"
+              f"{row[0][3]:>9.2f}{row[1][3]:>7.2f}"
+              f"{row[0][4]:>10.2f}{row[1][4]:>7.2f}")
+
+
+def measure_throughput(sizes=(8, 10, 12, 14), instances=10):
+    """
+    Generate random 3-SAT instances at the satisfiability threshold and
+    measure DIMACS loading, formula parsing and solver throughput.
+    """
+    print("Random 3-SAT throughput")
+    print(f"  {'vars':>5}{'clauses/s':>12}{'formulas/s':>12}"
+          f"{'solved/s':>10}{'sat':>5}")
+    with tempfile.TemporaryDirectory() as directory:
+        paths = generate_corpus(directory, sizes, instances=instances)
+        for num_vars in sizes:
+            group = [path for path in paths
+                     if os.path.basename(path).startswith(f"3sat-{num_vars}-")]
+
+            # Load every instance from DIMACS
+            start = time.perf_counter()
+            cnfs = [load_dimacs(path) for path in group]
+            loaded = time.perf_counter() - start
+            clauses = sum(len(cnf.conjuncts) for cnf in cnfs)
+
+            # Write each clause as a formula line and parse it back
+            formulas = os.path.join(directory, f"formulas-{num_vars}.txt")
+            with open(formulas, "w", encoding="utf-8") as f:
+                for cnf in cnfs:
+                    for clause in cnf.conjuncts:
+                        f.write(clause.formula() + "\n")
+            start = time.perf_counter()
+            with open(formulas, encoding="utf-8") as f:
+                parsed = sum(1 for _ in iter_formulas(f))
+            parsing = time.perf_counter() - start
+
+            # Solve each instance: the KB entails FALSE only if unsatisfiable
+            start = time.perf_counter()
+            satisfiable = [not model_check(cnf, FALSE) for cnf in cnfs]
+            solving = time.perf_counter() - start
+
+            print(f"  {num_vars:>5}{clauses / loaded:>12.0f}"
+                  f"{parsed / parsing:>12.0f}{len(cnfs) / solving:>10.1f}"
+                  f"{sum(satisfiable):>5}")
+
+
+def measure_batch(count=50, speakers=16, processes=(1, None)):
+    """
+    Solve a batch of generated puzzles, querying every knight and knave
+    symbol, sequentially and across a process pool.
+    """
+    print(f"Batch entailment: {count} puzzles with {speakers} speakers")
+    puzzles = []
+    for i in range(count):
+        knowledge, symbols, _ = generate_puzzle(speakers, 2 * speakers, seed=i)
+        puzzles.append((knowledge, symbols))
+    expected = None
+    for workers in processes:
+        solutions, rate = solve_puzzles(puzzles, processes=workers)
+        if expected is not None and solutions != expected:
+            raise ValueError("parallel solutions differ")
+        expected = solutions
+        label = "all CPUs" if workers is None else f"{workers} process"
+        print(f"  {label:<12}{rate:>10.1f} puzzles/s")
+
+
+def solve_enumerating(knowledge, symbols):
+    return [model_check(knowledge, symbol, prune=False, normalize=False)
+            for symbol in symbols]
+
+
+def solve_pruning(knowledge, symbols):
+    return [model_check(knowledge, symbol) for symbol in symbols]
+
+
+def solve_knowledge_base(knowledge, symbols):
+    kb = KnowledgeBase(knowledge)
+    return [kb.entails(symbol) for symbol in symbols]
+
+
+def solve_batched(knowledge, symbols):
+    return solve_batch([(knowledge, symbol) for symbol in symbols],
+                       processes=1)
+
+
+BACKENDS = [
+    ("model_check", solve_enumerating),
+    ("pruned", solve_pruning),
+    ("KnowledgeBase", solve_knowledge_base),
+    ("solve_batch", solve_batched)
+]
+
+
+def measure_scaling(sizes=(2, 3, 4, 5, 6, 8, 12, 16, 24, 32, 48),
+                    trials=3, budget=1.0, plot=None):
+    """
+    Time each entailment backend on generated puzzles with N speakers
+    making 2N statements, averaged over `trials` puzzles per size.
+    A backend is dropped once its average time exceeds `budget` seconds.
+    If `plot` is a filename and matplotlib is installed, save a plot of
+    solve time against N there.
+    """
+    print("Scaling: average seconds per puzzle against speakers")
+    print(f"  {'N':>4}" + "".join(f"{name:>15}" for name, _ in BACKENDS))
+    timings = {name: [] for name, _ in BACKENDS}
+    for n in sizes:
+        puzzles = [generate_puzzle(n, 2 * n, seed=(n * trials + i))
+                   for i in range(trials)]
+        row = f"  {n:>4}"
+        for name, solve in BACKENDS:
+            if timings[name] and timings[name][-1][1] > budget:
+                row += f"{'-':>15}"
+                continue
+            start = time.perf_counter()
+            for knowledge, symbols, solution in puzzles:
+                answers = solve(knowledge, symbols)
+                entailed = {s for s, answer in zip(symbols, answers) if answer}
+                if not entailed <= set(solution):
+                    raise ValueError(f"{name}: entailed a false symbol")
+            elapsed = (time.perf_counter() - start) / trials
+            timings[name].append((n, elapsed))
+            row += f"{elapsed:>15.4f}"
+        print(row)
+
+    if plot is not None:
+        try:
+            import matplotlib
+            matplotlib.use("Agg")
+            import matplotlib.pyplot as plt
+        except ImportError:
+            print("  matplotlib not installed, skipping plot")
+            return timings
+        for name, points in timings.items():
+            plt.plot([n for n, _ in points], [t for _, t in points],
+                     marker="o", label=name)
+        plt.yscale("log")
+        plt.xlabel("speakers (N)")
+        plt.ylabel("seconds per puzzle")
+        plt.legend()
+        plt.savefig(plot)
+        print(f"  plot saved to {plot}")
+    return timings
+
+
+def main():
+    compare_pruning()
+    compare_knowledge_base()
+    compare_simplification()
+    measure_throughput()
+    measure_batch()
+    measure_scaling(plot="scaling.png")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import random
+import string
+
+from logic import *
+
+
+def person_names(n):
+    """
+    Return names for `n` people: A to Z, then P27, P28, ...
+    """
+    return [string.ascii_uppercase[i] if i < 26 else f"P{i + 1}"
+            for i in range(n)]
+
+
+def characters(names):
+    """
+    Return the knight and knave symbols for each named person, and the
+    rule that everyone is exactly one of the two.
+    """
+    knights = {name: Symbol(f"{name} is a Knight") for name in names}
+    knaves = {name: Symbol(f"{name} is a Knave") for name in names}
+    rules = []
+    for name in names:
+        rules.append(Or(knights[name], knaves[name]))
+        rules.append(Not(And(knights[name], knaves[name])))
+    return knights, knaves, rules
+
+
+def random_claim(rng, names, knights, knaves):
+    """
+    Return a random statement one person could make about the others.
+    """
+    x, y = rng.sample(names, 2) if len(names) > 1 else (names[0], names[0])
+    kind = rng.randrange(5)
+
+    # "X is a knight." / "X is a knave."
+    if kind == 0:
+        return rng.choice((knights, knaves))[x]
+
+    # "X and Y are of the same kind."
+    if kind == 1:
+        return Biconditional(knights[x], knights[y])
+
+    # "X and Y are of different kinds."
+    if kind == 2:
+        return Not(Biconditional(knights[x], knights[y]))
+
+    # "At least one of X and Y is a knave."
+    if kind == 3:
+        return Or(knaves[x], knaves[y])
+
+    # "X is a knight and Y is a knave."
+    return And(knights[x], knaves[y])
+
+
+def generate_puzzle(n, m, seed=None):
+    """
+    Generate a random knights-and-knaves puzzle with `n` speakers making
+    `m` statements in total.
+
+    A hidden assignment of knights and knaves is drawn first, and each
+    statement is chosen to be true exactly when its speaker is a knight,
+    so the puzzle always has at least that solution.
+
+    Return (knowledge, symbols, solution), where `symbols` lists every
+    knight and knave symbol and `solution` the symbols true in the
+    hidden assignment.
+    """
+    if n < 1:
+        raise ValueError("a puzzle needs at least one speaker")
+    rng = random.Random(seed)
+    names = person_names(n)
+    knights, knaves, rules = characters(names)
+
+    # Decide who is secretly a knight
+    is_knight = {name: rng.random() < 0.5 for name in names}
+    model = {}
+    for name in names:
+        model[knights[name].name] = is_knight[name]
+        model[knaves[name].name] = not is_knight[name]
+
+    statements = []
+    for _ in range(m):
+        speaker = rng.choice(names)
+        claim = random_claim(rng, names, knights, knaves)
+
+        # Knights only say true things and knaves only false ones
+        if claim.evaluate(model) != is_knight[speaker]:
+            claim = Not(claim)
+
+        statements.append(Implication(knights[speaker], claim))
+        statements.append(Implication(knaves[speaker], Not(claim)))
+
+    symbols = [symbol for name in names
+               for symbol in (knights[name], knaves[name])]
+    solution = [symbol for symbol in symbols if model[symbol.name]]
+    return And(*rules, *statements), symbols, solution
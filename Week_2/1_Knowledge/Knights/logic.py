@@ -1,19 +1,64 @@
 import itertools
+import weakref
 
 
 class Sentence():
+    """
+    Immutable logical sentence. Sentences are hash-consed: constructing
+    a sentence structurally identical to a live one returns that same
+    object, so equality is identity and subformulas are shared.
+    """
+
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    # Every live sentence, keyed by its class and constructor arguments
+    _interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, args, symbols, **fields):
+        """Returns the shared sentence of class `cls` built from `args`."""
+        key = (cls, args)
+        sentence = Sentence._interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in fields.items():
+                object.__setattr__(sentence, name, value)
+            object.__setattr__(sentence, "_hash", hash(key))
+            object.__setattr__(sentence, "_symbols", frozenset(symbols))
+            Sentence._interned[key] = sentence
+        return sentence
+
+    def __eq__(self, other):
+        return self is other
+
+    def __hash__(self):
+        return self._hash
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences are immutable")
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """Evaluates the logical sentence under a partial model.
+
+        Returns True or False if the sentence has that value in every
+        completion of `model`, or None if its value is still unknown.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return frozenset()
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +88,13 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        return cls.intern((name,), {name}, name=name)
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __repr__(self):
         return self.name
@@ -62,23 +105,26 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        return self._symbols
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ("operand",)
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.intern((operand,), operand.symbols(), operand=operand)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,27 +132,32 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
     def symbols(self):
-        return self.operand.symbols()
+        return self._symbols
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+        return cls.intern(
+            conjuncts,
+            frozenset().union(*[conjunct.symbols() for conjunct in conjuncts]),
+            conjuncts=conjuncts
         )
 
+    def __reduce__(self):
+        return (And, self.conjuncts)
+
     def __repr__(self):
         conjunctions = ", ".join(
             [str(conjunct) for conjunct in self.conjuncts]
@@ -114,36 +165,49 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        """Returns a new conjunction with `conjunct` appended."""
+        return And(*self.conjuncts, conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        unknown = False
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                unknown = True
+        return None if unknown else True
+
     def formula(self):
+        if not self.conjuncts:
+            return "⊤"
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return self._symbols
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+        return cls.intern(
+            disjuncts,
+            frozenset().union(*[disjunct.symbols() for disjunct in disjuncts]),
+            disjuncts=disjuncts
         )
 
+    def __reduce__(self):
+        return (Or, self.disjuncts)
+
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
@@ -151,30 +215,42 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        unknown = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                unknown = True
+        return None if unknown else False
+
     def formula(self):
+        if not self.disjuncts:
+            return "⊥"
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return self._symbols
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return cls.intern(
+            (antecedent, consequent),
+            antecedent.symbols() | consequent.symbols(),
+            antecedent=antecedent, consequent=consequent
+        )
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,29 +259,39 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return self._symbols
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        return cls.intern(
+            (left, right), left.symbols() | right.symbols(),
+            left=left, right=right
+        )
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,21 +302,198 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+        return self._symbols
+
+
+# The empty conjunction is always true, the empty disjunction always false
+TRUE = And()
+FALSE = Or()
+
+
+def condition(sentence, model):
+    """Returns sentence with the symbols assigned in `model` replaced by
+    TRUE or FALSE, simplified."""
+
+    def substitute(sentence):
+        if isinstance(sentence, Symbol):
+            if sentence.name not in model:
+                return sentence
+            return TRUE if model[sentence.name] else FALSE
+        elif isinstance(sentence, Not):
+            return Not(substitute(sentence.operand))
+        elif isinstance(sentence, And):
+            return And(*[substitute(c) for c in sentence.conjuncts])
+        elif isinstance(sentence, Or):
+            return Or(*[substitute(d) for d in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            return Implication(substitute(sentence.antecedent),
+                               substitute(sentence.consequent))
+        elif isinstance(sentence, Biconditional):
+            return Biconditional(substitute(sentence.left),
+                                 substitute(sentence.right))
+        raise TypeError("must be a logical sentence")
+
+    if not sentence.symbols() & model.keys():
+        return simplify(sentence)
+    return simplify(substitute(sentence))
+
+
+def simplify(sentence, cache=None):
+    """Returns an equivalent sentence with nested And/Or flattened,
+    duplicates, tautologies and contradictions removed, and constants
+    folded."""
+
+    # Sentences are interned, so each shared subformula is simplified once
+    if cache is None:
+        cache = {}
+
+    def literal(sentence):
+        """Returns (name, value) if sentence is a literal, else None."""
+        if isinstance(sentence, Symbol):
+            return (sentence.name, True)
+        if isinstance(sentence, Not) and isinstance(sentence.operand, Symbol):
+            return (sentence.operand.name, False)
+        return None
+
+    def junction(cls, parts, unit, zero):
+        """Flattens and folds the operands of an And (or Or)."""
+        flat = []
+        seen = set()
+        for part in parts:
+            part = simplify(part, cache)
+            if isinstance(part, cls):
+                members = part.conjuncts if cls is And else part.disjuncts
+            else:
+                members = (part,)
+            for member in members:
+                if member is zero:
+                    return zero
+                if member is unit or member in seen:
+                    continue
+                seen.add(member)
+                flat.append(member)
+
+        # A literal alongside its negation decides the whole junction
+        for member in flat:
+            if isinstance(member, Not) and member.operand in seen:
+                return zero
+
+        if len(flat) == 1:
+            return flat[0]
+        return cls(*flat)
+
+    if sentence in cache:
+        return cache[sentence]
+
+    if isinstance(sentence, Symbol):
+        result = sentence
+
+    elif isinstance(sentence, Not):
+        operand = simplify(sentence.operand, cache)
+        if operand is TRUE:
+            result = FALSE
+        elif operand is FALSE:
+            result = TRUE
+        elif isinstance(operand, Not):
+            result = operand.operand
+        else:
+            result = Not(operand)
+
+    elif isinstance(sentence, And):
+        result = junction(And, sentence.conjuncts, TRUE, FALSE)
+
+    elif isinstance(sentence, Or):
+        result = junction(Or, sentence.disjuncts, FALSE, TRUE)
+
+    elif isinstance(sentence, Implication):
+        antecedent = simplify(sentence.antecedent, cache)
+        consequent = simplify(sentence.consequent, cache)
+
+        # The consequent only matters when a literal antecedent holds
+        assumed = literal(antecedent)
+        if assumed is not None:
+            consequent = condition(consequent, dict([assumed]))
+
+        if antecedent is FALSE or consequent is TRUE or antecedent is consequent:
+            result = TRUE
+        elif antecedent is TRUE:
+            result = consequent
+        elif consequent is FALSE:
+            result = simplify(Not(antecedent), cache)
+        else:
+            result = Implication(antecedent, consequent)
+
+    elif isinstance(sentence, Biconditional):
+        left = simplify(sentence.left, cache)
+        right = simplify(sentence.right, cache)
+        if left is right:
+            result = TRUE
+        elif left is TRUE or right is TRUE:
+            result = right if left is TRUE else left
+        elif left is FALSE or right is FALSE:
+            result = simplify(Not(right if left is FALSE else left), cache)
+        else:
+            result = Biconditional(left, right)
+
+    else:
+        raise TypeError("must be a logical sentence")
+
+    cache[sentence] = result
+    return result
+
+
+def model_check(knowledge, query, prune=True, stats=None, normalize=True):
+    """Checks if knowledge base entails query.
+
+    With `prune` set, knowledge and query are evaluated under each partial
+    model, so a branch is abandoned as soon as the knowledge base is false
+    in it (or its answer is already decided). With `normalize` set, both
+    are simplified first. If `stats` is a dict, the number of models
+    visited is accumulated in `stats["nodes"]`.
+    """
 
+    if normalize:
+        knowledge = simplify(knowledge)
+        query = simplify(query)
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    if stats is not None:
+        stats.setdefault("nodes", 0)
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
+        if stats is not None:
+            stats["nodes"] += 1
+
+        # Evaluate the partial model, stopping early if the branch is decided
+        if prune and symbols:
+            kb_value = knowledge.evaluate_partial(model)
+
+            # Knowledge base false in every completion, so nothing to check
+            if kb_value is False:
+                return True
+
+            # Knowledge base true in every completion, so the query decides
+            if kb_value is True:
+                query_value = query.evaluate_partial(model)
+                if query_value is not None:
+                    return query_value
+
         # If model has an assignment for each symbol
         if not symbols:
 
@@ -257,7 +520,100 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set(knowledge.symbols() | query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def extend_models(models, sentence, symbols):
+    """Extends each model over `symbols`, keeping only those where
+    sentence is true."""
+
+    def extend(model, remaining):
+        """Yields every completion of model in which sentence holds."""
+
+        # Abandon the branch as soon as the sentence is decided false
+        value = sentence.evaluate_partial(model)
+        if value is False:
+            return
+
+        # Sentence is true whatever the remaining symbols are
+        if value is True and not remaining:
+            yield model
+            return
+        if not remaining:
+            if sentence.evaluate(model):
+                yield model
+            return
+
+        # Branch on the next unassigned symbol
+        p = remaining[0]
+        for truth in (True, False):
+            extended = model.copy()
+            extended[p] = truth
+            yield from extend(extended, remaining[1:])
+
+    symbols = sorted(symbols)
+    extended = []
+    for model in models:
+        extended.extend(extend(model, symbols))
+    return extended
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that enumerates its satisfying models once,
+    and answers entailment queries against those cached models.
+    """
+
+    def __init__(self, *sentences):
+        self.sentences = []
+        self.symbols = set()
+
+        # An empty knowledge base is satisfied by the single empty model
+        self.models = [dict()]
+
+        # Answers to previous queries, cleared when the knowledge changes
+        self.cache = {}
+
+        for sentence in sentences:
+            self.add(sentence)
+
+    def __repr__(self):
+        return f"KnowledgeBase({', '.join(str(s) for s in self.sentences)})"
+
+    def add(self, sentence):
+        """Adds a sentence, narrowing the cached models incrementally."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        sentence = simplify(sentence)
+
+        # Only the symbols new to the knowledge base need enumerating
+        new_symbols = sentence.symbols() - self.symbols
+        self.symbols |= new_symbols
+        self.models = extend_models(self.models, sentence, new_symbols)
+        self.cache.clear()
+
+    def satisfiable(self):
+        """Returns True if some model makes every sentence true."""
+        return len(self.models) > 0
+
+    def entails(self, query):
+        """Checks if knowledge base entails query."""
+        Sentence.validate(query)
+        if query in self.cache:
+            return self.cache[query]
+
+        # Symbols the knowledge base says nothing about can take any value
+        free = sorted(query.symbols() - self.symbols)
+        assignments = [dict(zip(free, values)) for values in
+                       itertools.product((True, False), repeat=len(free))]
+
+        result = all(
+            query.evaluate({**model, **assignment})
+            for model in self.models
+            for assignment in assignments
+        )
+        self.cache[query] = result
+        return result
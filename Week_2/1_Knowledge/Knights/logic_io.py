@@ -0,0 +1,259 @@
+import os
+import random
+import re
+
+from logic import *
+
+# Operators accepted by the parser, in the notation produced by formula()
+# plus ASCII alternatives
+NOT = {"¬", "~", "!"}
+AND = {"∧", "&"}
+OR = {"∨", "|"}
+IMPLIES = "=>"
+IFF = "<=>"
+CONSTANTS = {"⊤": TRUE, "⊥": FALSE}
+
+TOKEN = re.compile(r"\s*(<=>|=>|[()¬~!∧&∨|⊤⊥]|[^()¬~!∧&∨|⊤⊥<=]+)")
+
+
+def tokenize(text):
+    """
+    Split a formula into operator, parenthesis and symbol name tokens.
+    Symbol names may contain spaces, so trailing whitespace is stripped.
+    """
+    tokens = []
+    position = 0
+    end = len(text.rstrip())
+    while position < end:
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"unexpected character at {position}: {text!r}")
+        tokens.append(match.group(1).rstrip())
+        position = match.end()
+    return tokens
+
+
+def parse_formula(text):
+    """
+    Parse a formula written in the notation of Sentence.formula()
+    (¬, ∧, ∨, =>, <=>, parentheses) and return the equivalent Sentence.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        raise ValueError("empty formula")
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        token = peek()
+        if token is None:
+            raise ValueError(f"unexpected end of formula: {text!r}")
+        position += 1
+        return token
+
+    def biconditional():
+        sentence = implication()
+        while peek() == IFF:
+            take()
+            sentence = Biconditional(sentence, implication())
+        return sentence
+
+    def implication():
+        # Implication is right-associative
+        antecedent = disjunction()
+        if peek() == IMPLIES:
+            take()
+            return Implication(antecedent, implication())
+        return antecedent
+
+    def disjunction():
+        disjuncts = [conjunction()]
+        while peek() in OR:
+            take()
+            disjuncts.append(conjunction())
+        return disjuncts[0] if len(disjuncts) == 1 else Or(*disjuncts)
+
+    def conjunction():
+        conjuncts = [negation()]
+        while peek() in AND:
+            take()
+            conjuncts.append(negation())
+        return conjuncts[0] if len(conjuncts) == 1 else And(*conjuncts)
+
+    def negation():
+        if peek() in NOT:
+            take()
+            return Not(negation())
+        return atom()
+
+    def atom():
+        token = take()
+        if token == "(":
+            sentence = biconditional()
+            if take() != ")":
+                raise ValueError(f"expected ')': {text!r}")
+            return sentence
+        if token in CONSTANTS:
+            return CONSTANTS[token]
+        if token in NOT or token in AND or token in OR or token in (
+            ")", IMPLIES, IFF
+        ):
+            raise ValueError(f"unexpected {token!r}: {text!r}")
+        return Symbol(token)
+
+    sentence = biconditional()
+    if position != len(tokens):
+        raise ValueError(f"unexpected {tokens[position]!r}: {text!r}")
+    return sentence
+
+
+def iter_formulas(f):
+    """
+    Yield one Sentence per non-empty line of file object `f`,
+    skipping lines that start with "#".
+    """
+    for line in f:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield parse_formula(line)
+
+
+def load_formulas(path):
+    """
+    Load a knowledge base from a file with one formula per line.
+    """
+    with open(path, encoding="utf-8") as f:
+        return KnowledgeBase(*iter_formulas(f))
+
+
+def iter_dimacs(f):
+    """
+    Yield each clause of a DIMACS CNF file object `f` as a tuple of
+    non-zero integer literals, reading one line at a time.
+    """
+    clause = []
+    for line in f:
+        line = line.strip()
+        if not line or line[0] in "cp":
+            continue
+        if line[0] == "%":
+            break
+        for literal in map(int, line.split()):
+            if literal == 0:
+                yield tuple(clause)
+                clause = []
+            else:
+                clause.append(literal)
+    if clause:
+        yield tuple(clause)
+
+
+def clause_sentence(clause):
+    """
+    Return the disjunction of the integer literals in `clause`, naming
+    each variable's Symbol after its number.
+    """
+    return Or(*[Symbol(str(literal)) if literal > 0
+                else Not(Symbol(str(-literal))) for literal in clause])
+
+
+def load_dimacs(path):
+    """
+    Load a DIMACS CNF file as a conjunction of clauses.
+    """
+    with open(path, encoding="utf-8") as f:
+        return And(*[clause_sentence(clause) for clause in iter_dimacs(f)])
+
+
+def sentence_clauses(sentence):
+    """
+    Convert a sentence already in CNF (an And of Ors of literals, or any
+    part thereof) into a list of integer clauses and a dict of variable
+    numbers by symbol name. Symbols named by a positive integer keep that
+    number; all others are numbered after them.
+    """
+    conjuncts = sentence.conjuncts if isinstance(sentence, And) else (sentence,)
+    clauses = []
+    for conjunct in conjuncts:
+        disjuncts = conjunct.disjuncts if isinstance(conjunct, Or) else (conjunct,)
+        clause = []
+        for literal in disjuncts:
+            if isinstance(literal, Symbol):
+                clause.append((literal.name, True))
+            elif isinstance(literal, Not) and isinstance(literal.operand, Symbol):
+                clause.append((literal.operand.name, False))
+            else:
+                raise ValueError(f"not in conjunctive normal form: {conjunct}")
+        clauses.append(clause)
+
+    names = sentence.symbols()
+    numbers = {name: int(name) for name in names
+               if name.isdigit() and int(name) > 0}
+    following = max(numbers.values(), default=0)
+    for name in sorted(names - numbers.keys()):
+        following += 1
+        numbers[name] = following
+
+    return ([tuple(numbers[name] if positive else -numbers[name]
+                   for name, positive in clause) for clause in clauses],
+            numbers)
+
+
+def write_dimacs(f, clauses, num_vars=None, num_clauses=None, comment=None):
+    """
+    Write integer `clauses` to file object `f` in DIMACS CNF format.
+    If both counts are given, `clauses` may be any iterable and is
+    written as it is consumed; otherwise it must be a sequence.
+    """
+    if num_clauses is None:
+        num_clauses = len(clauses)
+    if num_vars is None:
+        num_vars = max((abs(literal) for clause in clauses
+                        for literal in clause), default=0)
+    if comment is not None:
+        for line in comment.splitlines():
+            f.write(f"c {line}\n")
+    f.write(f"p cnf {num_vars} {num_clauses}\n")
+    for clause in clauses:
+        f.write(" ".join(map(str, clause)))
+        f.write(" 0\n")
+
+
+def random_ksat(num_vars, num_clauses, k=3, seed=None):
+    """
+    Yield `num_clauses` random clauses over `num_vars` variables, each
+    with `k` distinct variables negated with probability 1/2.
+    """
+    if k > num_vars:
+        raise ValueError("k must not exceed the number of variables")
+    rng = random.Random(seed)
+    variables = range(1, num_vars + 1)
+    for _ in range(num_clauses):
+        yield tuple(v if rng.random() < 0.5 else -v
+                    for v in rng.sample(variables, k))
+
+
+def generate_corpus(directory, sizes, ratio=4.26, k=3, instances=10, seed=0):
+    """
+    Write `instances` random k-SAT files for each number of variables
+    in `sizes`, with round(ratio * variables) clauses each, to
+    `directory`. Return the list of paths written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for num_vars in sizes:
+        num_clauses = round(ratio * num_vars)
+        for i in range(instances):
+            path = os.path.join(directory, f"{k}sat-{num_vars}-{i}.cnf")
+            with open(path, "w", encoding="utf-8") as f:
+                clauses = random_ksat(num_vars, num_clauses, k,
+                                      seed=f"{seed}-{num_vars}-{i}")
+                write_dimacs(
+                    f, clauses, num_vars=num_vars, num_clauses=num_clauses,
+                    comment=f"random {k}-SAT, seed {seed}"
+                )
+            paths.append(path)
+    return paths
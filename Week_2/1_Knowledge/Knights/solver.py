@@ -0,0 +1,75 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from logic import *
+
+
+def solve_group(knowledge, queries):
+    """
+    Answer every query against one knowledge sentence, enumerating
+    its models only once.
+    """
+    kb = KnowledgeBase(knowledge)
+    return [kb.entails(query) for query in queries]
+
+
+def solve_batch(pairs, processes=None, chunksize=None):
+    """
+    Check entailment for many (knowledge, query) pairs.
+
+    Pairs with the same knowledge are grouped so its models are
+    enumerated once for all of their queries, and independent knowledge
+    bases are spread across a pool of `processes` worker processes
+    (all available CPUs by default; 1 solves in this process).
+    Return the list of answers in the order of `pairs`.
+    """
+    # Sentences are interned, so identical knowledge groups together
+    groups = {}
+    for index, (knowledge, query) in enumerate(pairs):
+        Sentence.validate(knowledge)
+        Sentence.validate(query)
+        groups.setdefault(knowledge, []).append((index, query))
+
+    knowledges = list(groups)
+    queries = [[query for _, query in groups[knowledge]]
+               for knowledge in knowledges]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(knowledges))
+
+    if processes <= 1:
+        results = map(solve_group, knowledges, queries)
+    else:
+        if chunksize is None:
+            chunksize = max(1, len(knowledges) // (processes * 4))
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(solve_group, knowledges, queries,
+                                        chunksize=chunksize))
+
+    # Put each answer back in the position of its pair
+    answers = [None] * len(pairs)
+    for knowledge, group_answers in zip(knowledges, results):
+        for (index, _), answer in zip(groups[knowledge], group_answers):
+            answers[index] = answer
+    return answers
+
+
+def solve_puzzles(puzzles, processes=None):
+    """
+    Solve many puzzles, each a (knowledge, symbols) pair, returning for
+    each puzzle the list of its symbols that the knowledge entails,
+    and the number of puzzles solved per second.
+    """
+    pairs = [(knowledge, symbol)
+             for knowledge, symbols in puzzles for symbol in symbols]
+
+    start = time.perf_counter()
+    answers = iter(solve_batch(pairs, processes=processes))
+    elapsed = time.perf_counter() - start
+
+    solutions = [[symbol for symbol in symbols if next(answers)]
+                 for _, symbols in puzzles]
+    rate = len(puzzles) / elapsed if elapsed > 0 else float("inf")
+    return solutions, rate
@@ -0,0 +1,198 @@
+import random
+import time
+
+from minesweeper import BitMinesweeperAI, Minesweeper, MinesweeperAI
+from csp import exact_deductions
+from simulate import report, simulate
+
+# Boards to measure: (height, width, mines)
+BOARDS = [
+    (16, 30, 99),
+    (50, 50, 400),
+    (100, 100, 1600),
+    (200, 200, 4000)
+]
+
+
+def clear_board(height, width, mines, seed=0, ai_class=MinesweeperAI):
+    """
+    Let the AI work through a whole board, timing add_knowledge on every
+    move. A random move onto a mine is treated as if the mine had been
+    flagged instead, so that every board is played to the end.
+    Return the list of per-move inference times in seconds, and the
+    largest knowledge base size seen.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = ai_class(height=height, width=width)
+    timings = []
+    largest = 0
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            if move is None:
+                break
+        if game.is_mine(move):
+            ai.mark_mine(move)
+            ai.infer()
+            continue
+        start = time.perf_counter()
+        ai.add_knowledge(move, game.nearby_mines(move))
+        timings.append(time.perf_counter() - start)
+        largest = max(largest, len(ai.knowledge))
+    return timings, largest
+
+
+def measure_inference(boards=BOARDS, ai_classes=(MinesweeperAI, BitMinesweeperAI)):
+    """
+    Report mean and worst add_knowledge time per move on each board,
+    for each AI (and so sentence representation).
+    """
+    print("Inference time per move")
+    print(f"  {'board':<16}{'ai':<18}{'moves':>7}{'mean ms':>9}{'max ms':>9}{'kb':>6}")
+    for height, width, mines in boards:
+        for ai_class in ai_classes:
+            timings, largest = clear_board(height, width, mines, ai_class=ai_class)
+            mean = sum(timings) / len(timings) * 1000
+            print(f"  {f'{height}x{width}/{mines}':<16}{ai_class.__name__:<18}"
+                  f"{len(timings):>7}{mean:>9.3f}{max(timings) * 1000:>9.3f}"
+                  f"{largest:>6}")
+
+
+def measure_guessing(configs=((8, 8, 0.125), (16, 16, 0.156), (16, 30, 0.206)),
+                     games=100):
+    """
+    Compare win rate of uniform random guessing against picking the
+    cell least likely to be a mine.
+    """
+    print("Guessing: uniform random vs. lowest mine probability")
+    for label, best_guess in (("random", False), ("best", True)):
+        print(f"  {label}")
+        report(simulate(configs, games=games, ai_options={"best_guess": best_guess}))
+
+
+def measure_flood_fill(boards=BOARDS, games=20):
+    """
+    Compare feeding the AI each cell of a revealed zero region with its
+    own add_knowledge call against one add_knowledge_batch call.
+    """
+    print("Revealing zero regions: one call per cell vs. one batch")
+    print(f"  {'board':<16}{'cells':>7}{'single ms':>11}{'batch ms':>10}")
+    for height, width, mines in boards:
+        cells = 0
+        single = batch = 0.0
+        for seed in range(games):
+            random.seed(seed)
+            game = Minesweeper(height=height, width=width, mines=mines)
+            zeros = [(i, j) for i in range(height) for j in range(width)
+                     if (i, j) not in game.mines and game.nearby_mines((i, j)) == 0]
+            if not zeros:
+                continue
+            region = game.reveal_region(random.choice(zeros))
+            cells += len(region)
+
+            ai = MinesweeperAI(height=height, width=width)
+            start = time.perf_counter()
+            for cell, count in region.items():
+                ai.add_knowledge(cell, count)
+            single += time.perf_counter() - start
+
+            ai = MinesweeperAI(height=height, width=width)
+            start = time.perf_counter()
+            ai.add_knowledge_batch(region)
+            batch += time.perf_counter() - start
+        print(f"  {f'{height}x{width}/{mines}':<16}{cells / games:>7.0f}"
+              f"{single / games * 1000:>11.3f}{batch / games * 1000:>10.3f}")
+
+
+def measure_exact(configs=((16, 16, 40), (16, 30, 99)), games=100):
+    """
+    Each time the subset rule leaves the AI without a safe move, time
+    the exact solver on the same knowledge and count the cells it
+    shows to be forced. Then compare whole games in both modes.
+    """
+    print("Exact deduction where the subset rule is stuck")
+    print(f"  {'board':<16}{'stuck':>7}{'helped':>8}{'cells':>7}{'mean ms':>9}{'max ms':>9}")
+    for height, width, mines in configs:
+        stuck = helped = forced = 0
+        timings = []
+        for seed in range(games):
+            random.seed(seed)
+            game = Minesweeper(height=height, width=width, mines=mines)
+            ai = MinesweeperAI(height=height, width=width, total_mines=mines)
+            while True:
+                move = ai.make_safe_move()
+                if move is None:
+                    start = time.perf_counter()
+                    safes, found_mines = exact_deductions(ai.knowledge)
+                    timings.append(time.perf_counter() - start)
+                    stuck += 1
+                    helped += bool(safes or found_mines)
+                    forced += len(safes) + len(found_mines)
+                    move = ai.make_random_move()
+                    if move is None:
+                        break
+                if game.is_mine(move):
+                    break
+                ai.add_knowledge(move, game.nearby_mines(move))
+        print(f"  {f'{height}x{width}/{mines}':<16}{stuck:>7}{helped:>8}"
+              f"{forced / stuck:>7.2f}{sum(timings) / len(timings) * 1000:>9.3f}"
+              f"{max(timings) * 1000:>9.3f}")
+
+    densities = [(height, width, mines / (height * width))
+                 for height, width, mines in configs]
+    for label, exact in (("subset rule", False), ("exact", True)):
+        print(f"  {label}")
+        report(simulate(densities, games=games, ai_options={"exact": exact}))
+
+
+def measure_move_selection(boards=BOARDS, best_guess=(False, True)):
+    """
+    Report mean and worst time to choose each safe and random move
+    while the AI works through a whole board.
+    """
+    print("Move selection time")
+    print(f"  {'board':<16}{'guessing':<10}{'safe':>7}{'mean ms':>9}{'max ms':>9}"
+          f"{'random':>8}{'mean ms':>9}{'max ms':>9}")
+    for height, width, mines in boards:
+        for guess in best_guess:
+            random.seed(0)
+            game = Minesweeper(height=height, width=width, mines=mines)
+            ai = MinesweeperAI(height=height, width=width, total_mines=mines,
+                               best_guess=guess)
+            safe_timings = []
+            random_timings = []
+            while True:
+                start = time.perf_counter()
+                move = ai.make_safe_move()
+                safe_timings.append(time.perf_counter() - start)
+                if move is None:
+                    start = time.perf_counter()
+                    move = ai.make_random_move()
+                    random_timings.append(time.perf_counter() - start)
+                    if move is None:
+                        break
+                if game.is_mine(move):
+                    ai.mark_mine(move)
+                    ai.infer()
+                    continue
+                ai.add_knowledge(move, game.nearby_mines(move))
+            label = "best" if guess else "random"
+            print(f"  {f'{height}x{width}/{mines}':<16}{label:<10}{len(safe_timings):>7}"
+                  f"{sum(safe_timings) / len(safe_timings) * 1000:>9.4f}"
+                  f"{max(safe_timings) * 1000:>9.4f}{len(random_timings):>8}"
+                  f"{sum(random_timings) / len(random_timings) * 1000:>9.4f}"
+                  f"{max(random_timings) * 1000:>9.4f}")
+
+
+def main():
+    measure_inference()
+    measure_guessing()
+    measure_flood_fill()
+    measure_exact()
+    measure_move_selection()
+
+
+if __name__ == "__main__":
+    main()
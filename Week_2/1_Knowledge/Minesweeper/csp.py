@@ -0,0 +1,135 @@
+import time
+
+from probability import MAX_COMPONENT, OutOfTime, components
+
+
+def propagate(values, constraints, cell_constraints, queue):
+    """
+    Assigns every cell forced by the constraints in `queue`, and by the
+    constraints those assignments touch, in place. Returns False if a
+    constraint can no longer be satisfied.
+    """
+    while queue:
+        c = queue.pop()
+        members, count = constraints[c]
+        placed = 0
+        unassigned = []
+        for i in members:
+            if values[i] is None:
+                unassigned.append(i)
+            else:
+                placed += values[i]
+
+        if placed > count or placed + len(unassigned) < count:
+            return False
+
+        # All mines found, or all remaining cells needed as mines
+        if unassigned and placed == count:
+            value = 0
+        elif unassigned and placed + len(unassigned) == count:
+            value = 1
+        else:
+            continue
+        for i in unassigned:
+            values[i] = value
+            queue.extend(cell_constraints[i])
+    return True
+
+
+def find_solution(values, constraints, cell_constraints, queue, deadline=None):
+    """
+    Completes the partial assignment `values` into one satisfying every
+    constraint, by propagation and backtracking. Returns the completed
+    list, or None if there is none.
+    """
+    if deadline is not None and time.perf_counter() > deadline:
+        raise OutOfTime()
+    values = list(values)
+    if not propagate(values, constraints, cell_constraints, queue):
+        return None
+
+    # Branch on the first cell propagation could not decide
+    for i, value in enumerate(values):
+        if value is None:
+            break
+    else:
+        return values
+
+    for value in (0, 1):
+        values[i] = value
+        solution = find_solution(values, constraints, cell_constraints,
+                                 list(cell_constraints[i]), deadline)
+        if solution is not None:
+            return solution
+    return None
+
+
+def forced_cells(cells, constraints, deadline=None):
+    """
+    Return the sets of cells in a component that are safe, and that are
+    mines, in every assignment satisfying its constraints.
+
+    One solution is found first; then for each cell not yet seen taking
+    both values, a solution with the opposite value is searched for.
+    If none exists the cell is forced. Raises ValueError if the
+    constraints cannot all be satisfied.
+    """
+    position = {cell: i for i, cell in enumerate(cells)}
+    indexed = [([position[cell] for cell in members], count)
+               for members, count in constraints]
+    cell_constraints = [[] for _ in cells]
+    for c, (members, _) in enumerate(indexed):
+        for i in members:
+            cell_constraints[i].append(c)
+
+    unassigned = [None] * len(cells)
+    every = list(range(len(indexed)))
+    base = find_solution(unassigned, indexed, cell_constraints, every, deadline)
+    if base is None:
+        raise ValueError("Inconsistent knowledge: no assignment of mines fits")
+
+    # Values each cell has been seen to take in some solution
+    seen = [{value} for value in base]
+    for i in range(len(cells)):
+        if len(seen[i]) == 2:
+            continue
+        assumption = list(unassigned)
+        assumption[i] = 1 - base[i]
+        solution = find_solution(assumption, indexed, cell_constraints,
+                                 list(cell_constraints[i]), deadline)
+        if solution is not None:
+            for j, value in enumerate(solution):
+                seen[j].add(value)
+
+    safes = {cells[i] for i in range(len(cells)) if seen[i] == {0}}
+    mines = {cells[i] for i in range(len(cells)) if seen[i] == {1}}
+    return safes, mines
+
+
+def exact_deductions(knowledge, cache=None, time_budget=None):
+    """
+    Return the sets of cells that the sentences in `knowledge` force to
+    be safe, and to be mines, treating each connected component of the
+    frontier as a constraint satisfaction problem. Results are memoised
+    in the dict `cache` by each component's constraints. Components too
+    large, or not solved within `time_budget` seconds, are skipped.
+    """
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    if cache is None:
+        cache = {}
+
+    safes = set()
+    mines = set()
+    for cells, constraints in components(knowledge):
+        key = tuple(constraints)
+        if key not in cache:
+            if len(cells) > MAX_COMPONENT:
+                continue
+            try:
+                cache[key] = forced_cells(cells, constraints, deadline)
+            except OutOfTime:
+                continue
+        component_safes, component_mines = cache[key]
+        safes |= component_safes
+        mines |= component_mines
+    return safes, mines
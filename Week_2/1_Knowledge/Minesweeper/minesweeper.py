@@ -1,6 +1,9 @@
 import itertools
 import random
 
+from csp import exact_deductions
+from probability import frontier_probabilities
+
 
 class Minesweeper():
     """
@@ -14,21 +17,31 @@ class Minesweeper():
         self.width = width
         self.mines = set()
 
+        if not 0 <= mines <= height * width:
+            raise ValueError("number of mines must fit on the board")
+
         # Initialize an empty field with no mines
-        self.board = []
+        self.board = [[False] * self.width for _ in range(self.height)]
+
+        # Add mines randomly, choosing distinct cells by their flat index
+        for index in random.sample(range(height * width), mines):
+            i, j = divmod(index, width)
+            self.mines.add((i, j))
+            self.board[i][j] = True
+
+        # Count the mines around every cell once, as a 3x3 box sum
+        # (a sum along each row, then down each column) minus the cell itself
+        zero = [0] * self.width
+        across = []
+        for row in self.board:
+            padded = [False] + row + [False]
+            across.append([a + b + c for a, b, c in zip(padded, padded[1:], padded[2:])])
+        self.counts = []
         for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+            above = across[i - 1] if i > 0 else zero
+            below = across[i + 1] if i + 1 < self.height else zero
+            self.counts.append([a + b + c - mine for a, b, c, mine
+                                in zip(above, across[i], below, self.board[i])])
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -59,23 +72,33 @@ class Minesweeper():
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
+        # Counts were worked out when the mines were placed
+        i, j = cell
+        return self.counts[i][j]
 
-        return count
+    def reveal_region(self, cell):
+        """
+        Returns a dict of the cells revealed by clicking a safe `cell`,
+        each mapped to its number of nearby mines. If the cell has no
+        nearby mines, every cell connected to it through cells with no
+        nearby mines is revealed too, along with their bordering cells.
+        """
+        revealed = {cell: self.nearby_mines(cell)}
+        frontier = [cell] if revealed[cell] == 0 else []
+
+        # Flood fill outwards from cells with no nearby mines
+        while frontier:
+            i, j = frontier.pop()
+            for ii in range(max(i - 1, 0), min(i + 2, self.height)):
+                for jj in range(max(j - 1, 0), min(j + 2, self.width)):
+                    if (ii, jj) in revealed:
+                        continue
+                    count = self.nearby_mines((ii, jj))
+                    revealed[(ii, jj)] = count
+                    if count == 0:
+                        frontier.append((ii, jj))
+
+        return revealed
 
     def won(self):
         """
@@ -101,6 +124,34 @@ class Sentence():
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def __len__(self):
+        return len(self.cells)
+
+    def __lt__(self, other):
+        """
+        Checks if this sentence's cells are a proper subset of `other`'s.
+        """
+        return self.cells < other.cells
+
+    def __sub__(self, other):
+        """
+        Returns the sentence about the cells of self not in `other`,
+        given that `other`'s cells are a subset of self's.
+        """
+        return Sentence(self.cells - other.cells, self.count - other.count)
+
+    def key(self):
+        """
+        Returns a hashable snapshot of the sentence, for deduplication.
+        """
+        return (frozenset(self.cells), self.count)
+
+    def index_keys(self):
+        """
+        Returns the keys under which the AI indexes this sentence.
+        """
+        return self.cells
+
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
@@ -154,17 +205,179 @@ class Sentence():
             pass
 
 
+class BitSentence():
+    """
+    Logical statement about a Minesweeper game, with its cells stored
+    as the set bits of an integer, bit i * width + j for cell (i, j).
+    Subset tests, differences and equality are then integer operations.
+    """
+
+    def __init__(self, cells, count, width):
+        self.width = width
+        self.count = count
+        if isinstance(cells, int):
+            self.mask = cells
+        else:
+            self.mask = 0
+            for i, j in cells:
+                self.mask |= 1 << (i * width + j)
+
+    def __eq__(self, other):
+        return self.mask == other.mask and self.count == other.count
+
+    def __str__(self):
+        return f"{self.cells} = {self.count}"
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __lt__(self, other):
+        """
+        Checks if this sentence's cells are a proper subset of `other`'s.
+        """
+        return self.mask != other.mask and self.mask & ~other.mask == 0
+
+    def __sub__(self, other):
+        """
+        Returns the sentence about the cells of self not in `other`,
+        given that `other`'s cells are a subset of self's.
+        """
+        return BitSentence(self.mask & ~other.mask, self.count - other.count, self.width)
+
+    @property
+    def cells(self):
+        """
+        The set of (i, j) cells in the sentence.
+        """
+        return {divmod(index, self.width) for index in self.index_keys()}
+
+    def key(self):
+        """
+        Returns a hashable snapshot of the sentence, for deduplication.
+        """
+        return (self.mask, self.count)
+
+    def index_keys(self):
+        """
+        Returns the bit index of each cell in the sentence.
+        """
+        indices = []
+        mask = self.mask
+        while mask:
+            lowest = mask & -mask
+            indices.append(lowest.bit_length() - 1)
+            mask ^= lowest
+        return indices
+
+    def known_mines(self):
+        """
+        Returns the set of all cells in self.cells known to be mines.
+        """
+        if self.count > 0 and len(self) == self.count:
+            return self.cells
+        return set()
+
+    def known_safes(self):
+        """
+        Returns the set of all cells in self.cells known to be safe.
+        """
+        if self.count == 0 and self.mask:
+            return self.cells
+        return set()
+
+    def mark_mine(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be a mine.
+        """
+        bit = 1 << (cell[0] * self.width + cell[1])
+        if self.mask & bit:
+            self.mask ^= bit
+            self.count -= 1
+
+    def mark_safe(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be safe.
+        """
+        bit = 1 << (cell[0] * self.width + cell[1])
+        if self.mask & bit:
+            self.mask ^= bit
+
+
+class RandomSet():
+    """
+    Set of cells supporting adding, removing and choosing a cell
+    uniformly at random in constant time
+    """
+
+    def __init__(self, cells=()):
+        # The cells in no particular order, and each one's place in the list
+        self.cells = list(cells)
+        self.positions = {cell: i for i, cell in enumerate(self.cells)}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.positions
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def add(self, cell):
+        if cell not in self.positions:
+            self.positions[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        """
+        Removes the cell, if present, by moving the last cell into its place.
+        """
+        i = self.positions.pop(cell, None)
+        if i is None:
+            return
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self.positions[last] = i
+
+    def choice(self):
+        return random.choice(self.cells)
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, total_mines=None,
+                 best_guess=True, guess_budget=0.1,
+                 exact=False, exact_budget=0.1):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Number of mines on the board, if the AI is told it
+        self.total_mines = total_mines
+
+        # Whether random moves should pick the cell least likely to be a
+        # mine, and how many seconds each such move may spend deciding
+        self.best_guess = best_guess
+        self.guess_budget = guess_budget
+
+        # Mine probabilities of frontier components, by their constraints
+        self.probability_cache = {}
+
+        # Whether to find every forced cell by solving the frontier exactly,
+        # how many seconds each round may take, the forced cells of each
+        # component by its constraints, and how many cells were found so
+        self.exact = exact
+        self.exact_budget = exact_budget
+        self.exact_cache = {}
+        self.exact_found = 0
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -172,9 +385,51 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
+        # Cells that are neither moves made nor known mines, and known
+        # safe cells not yet moved to, kept up to date as cells are marked
+        self.candidates = RandomSet(itertools.product(range(height), range(width)))
+        self.safe_moves = RandomSet()
+
         # List of sentences about the game known to be true
         self.knowledge = []
 
+        # Index from each undetermined cell to the sentences containing it
+        self.cell_sentences = {}
+
+        # Sentences changed since inference last looked at them, by id
+        self.pending = {}
+
+        # Snapshots of every sentence added, so none is added twice
+        self.sentence_keys = set()
+
+    def new_sentence(self, cells, count):
+        """
+        Returns a sentence of the representation this AI uses.
+        """
+        return Sentence(cells, count)
+
+    def index_key(self, cell):
+        """
+        Returns the key under which sentences containing `cell` are indexed.
+        """
+        return cell
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base, indexing it by its cells
+        and queueing it for inference. Returns False if the same sentence
+        has already been added.
+        """
+        key = sentence.key()
+        if key in self.sentence_keys:
+            return False
+        self.sentence_keys.add(key)
+        self.knowledge.append(sentence)
+        for index_key in sentence.index_keys():
+            self.cell_sentences.setdefault(index_key, []).append(sentence)
+        self.pending[id(sentence)] = sentence
+        return True
+
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
@@ -182,10 +437,15 @@ class MinesweeperAI():
         """
         # Add the cell to the list of known mines
         self.mines.add(cell)
-        # Iterate through each sentence
-        for sentence in self.knowledge:
+        # A mine is never a move worth making
+        self.candidates.discard(cell)
+        # Only the sentences containing the cell need updating,
+        # and once marked the cell is in none of them
+        for sentence in self.cell_sentences.pop(self.index_key(cell), ()):
             # For each setence mark this mine (thus removing it from sentence)
             sentence.mark_mine(cell)
+            # Queue the changed sentence for inference
+            self.pending[id(sentence)] = sentence
 
     def mark_safe(self, cell):
         """
@@ -194,10 +454,25 @@ class MinesweeperAI():
         """
         # Add the cell to the list of known safes
         self.safes.add(cell)
-        # Iterate through each sentence
-        for sentence in self.knowledge:
+        # It is a safe move until it has been made
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        # Only the sentences containing the cell need updating,
+        # and once marked the cell is in none of them
+        for sentence in self.cell_sentences.pop(self.index_key(cell), ()):
             # For each sentence mark this mine as safe (thus removing it from sentence)
             sentence.mark_safe(cell)
+            # Queue the changed sentence for inference
+            self.pending[id(sentence)] = sentence
+
+    def mark_move(self, cell):
+        """
+        Records a move made on the cell, which is then no longer a
+        candidate for any future move.
+        """
+        self.moves_made.add(cell)
+        self.candidates.discard(cell)
+        self.safe_moves.discard(cell)
 
     def add_knowledge(self, cell, count):
         """
@@ -215,12 +490,39 @@ class MinesweeperAI():
                if they can be inferred from existing knowledge
         """
         # 1) Mark cell as move that has been made
-        self.moves_made.add(cell)
+        self.mark_move(cell)
 
         # 2) Mark cell as a safe cell
         self.mark_safe(cell)
 
-        # 3)
+        # 3) Add a sentence about the cell's neighbours
+        self.add_observation(cell, count)
+
+        # 4) and 5) Draw any conclusions from the changed knowledge
+        self.infer()
+
+    def add_knowledge_batch(self, observations):
+        """
+        Called when the Minesweeper board reveals many safe cells at once,
+        with `observations` a dict of each cell to its number of
+        neighboring mines. Records every cell, then draws conclusions
+        from all of them together in a single round of inference.
+        """
+        # Mark every cell first, so no sentence includes a revealed cell
+        for cell in observations:
+            self.mark_move(cell)
+            self.mark_safe(cell)
+
+        for cell, count in observations.items():
+            self.add_observation(cell, count)
+
+        self.infer()
+
+    def add_observation(self, cell, count):
+        """
+        Adds a sentence to the knowledge base saying that `count` of the
+        undetermined cells around `cell` are mines, less any known mines.
+        """
         # Establish coordinates of cell
         i0 = cell[0]
         j0 = cell[1]
@@ -256,91 +558,94 @@ class MinesweeperAI():
         # Only add a sentence if there are unknown cells remaining
         if unknown_cells:
             # Create logic sentence of remaining unknown cells and the (adjusted) count
-            sentence = Sentence(cells = unknown_cells, count = adjusted_count)
+            sentence = self.new_sentence(unknown_cells, adjusted_count)
             # Add logic sentence to knowledge base
-            self.knowledge.append(sentence)
-
-        # From the added safe cell, are any sentences now different
-        # Initialise a while loop
-        updated = True
-        while updated:
-            updated = False
-            # Iterate through each sentence in the knowledge base
-            for sentence in self.knowledge[:]:
-                # Check through the sentence and test for known mines
-                for mine in sentence.known_mines():
-                    # If the known mine is not already in the list of known mines then:
-                    if mine not in self.mines:
-                        # Add to the list of known mines
-                        self.mark_mine(mine)
-                        # Restart while loop
-                        updated = True
-                # Check through the sentence and test for safes
-                for safe in sentence.known_safes():
-                    # If the safe is not yet known then:
-                    if safe not in self.safes:
-                        # Add to the list of known safes
-                        self.mark_safe(safe)
-                        # Restart while loop as new change added
-                        updated = True
-
-                # If the sentence contains no data (no cells or count) then remove from knowledge base
-                if len(sentence.cells) == 0:
-                    if sentence.count == 0:
-                        # If no count then remove sentence from knowledge base
-                        self.knowledge.remove(sentence)
-                        # Restart while loop as there has been an update
-                        updated = True
-                    else:
-                        # Otherwise raise a value error, since the sentence was not logically sound
-                        raise ValueError ("Inconsistent sentence: no cells but a nonzero count")
-                    continue
+            self.add_sentence(sentence)
 
-                # All cells must be mines if number of cells == count
-                if len(sentence.cells) == sentence.count:
-                    # Mark all cells in sentence as mines
-                    for cell in set(sentence.cells):
-                        # Use self. because then global state is updated
-                        self.mark_mine(cell)
-                    # Restart while loop as there has been an update
-                    updated = True
-                    continue
+    def infer(self):
+        """
+        Marks any cells that can be concluded to be safe or mines, and adds
+        any sentences that can be inferred, until nothing new follows.
+        """
+        self.infer_subsets()
+
+        # In exact mode, the constraint solver may force cells the subset
+        # rule missed, and marking those gives the subset rule more to do
+        while self.exact and self.infer_exact():
+            self.infer_subsets()
 
-                # If the count of the cells is 0, then all cells are safe
-                if sentence.count == 0:
-                    # Mark all cells as safe
-                    for cell in set(sentence.cells):
-                        # Use self. because then global state is updated
-                        self.mark_safe(cell)
-                    # Restart while loop as there has been an update
-                    updated = True
+    def infer_subsets(self):
+        """
+        Marks cells from sentences whose cells are all mines or all safe,
+        and adds the difference of any sentence and its subsets.
+        Only sentences that have changed since they were last examined
+        are revisited, and only against sentences sharing a cell with them.
+        """
+        # Work through the sentences that have changed
+        while self.pending:
+            _, sentence = self.pending.popitem()
+
+            # A sentence with no cells left carries no information
+            if len(sentence) == 0:
+                if sentence.count != 0:
+                    # The sentence was not logically sound
+                    raise ValueError ("Inconsistent sentence: no cells but a nonzero count")
+                continue
+
+            # Check through the sentence and test for known mines and safes
+            # (marking queues every sentence it changes, this one included,
+            # so it will be looked at again in its new form)
+            mines = sentence.known_mines() - self.mines
+            safes = sentence.known_safes() - self.safes
+            for mine in mines:
+                self.mark_mine(mine)
+            for safe in safes:
+                self.mark_safe(safe)
+            if mines or safes:
+                continue
+
+            # Only sentences sharing a cell can be a subset or superset
+            neighbours = {}
+            for index_key in sentence.index_keys():
+                for other in self.cell_sentences.get(index_key, ()):
+                    neighbours[id(other)] = other
+            neighbours.pop(id(sentence), None)
+
+            for other in neighbours.values():
+                # If one sentence's cells are a subset of the other's, the
+                # difference in cells holds the difference in mines
+                if other < sentence:
+                    smaller, larger = other, sentence
+                elif sentence < other:
+                    smaller, larger = sentence, other
+                else:
                     continue
+                # Adding the sentence queues it, unless it is a duplicate
+                self.add_sentence(larger - smaller)
 
-            # Find if another sentence is a subset of current sentence
-            new_knowledge = []
-            # Iterate through sentences in the knowledge base
-            for sentence in self.knowledge:
-                # Iterate through other sentences in knowledge base
-                for comparative_sentence in self.knowledge:
-                    # If the cells of the comparative sentence are a subset of the sentence cells then:
-                    if comparative_sentence.cells < sentence.cells:
-                        # Find the difference in cells
-                        cell_difference = sentence.cells - comparative_sentence.cells
-                        # Find the differences in count
-                        count_difference = sentence.count - comparative_sentence.count
-
-                        # Create new sentence from combination of the two
-                        new_sentence = Sentence(cells = cell_difference, count = count_difference)
-                        # Check that it will not be a duplicate
-                        if new_sentence not in self.knowledge and new_sentence not in new_knowledge:
-                            # Add the sentence to the new_knowledge
-                            new_knowledge.append(new_sentence)
-                            # Restart while loop
-                            updated = True
-
-            # Add new sentences to knowledge base
-            self.knowledge.extend(new_knowledge)
+        # Remove sentences with no cells from the knowledge base
+        self.knowledge = [sentence for sentence in self.knowledge if len(sentence)]
 
+    def infer_exact(self):
+        """
+        Marks every cell the knowledge base forces to be safe or a mine,
+        solving each connected part of the frontier as a constraint
+        satisfaction problem. Returns True if any new cell was marked.
+        """
+        # Forget old components rather than let the cache grow unbounded
+        if len(self.exact_cache) > 10000:
+            self.exact_cache.clear()
+
+        safes, mines = exact_deductions(self.knowledge, self.exact_cache,
+                                        self.exact_budget)
+        safes -= self.safes
+        mines -= self.mines
+        for mine in mines:
+            self.mark_mine(mine)
+        for safe in safes:
+            self.mark_safe(safe)
+        self.exact_found += len(safes) + len(mines)
+        return bool(safes or mines)
 
     def make_safe_move(self):
         """
@@ -352,13 +657,11 @@ class MinesweeperAI():
         and self.moves_made, but should not modify any of those values.
         """
         # Return a safe move, that has not been made yet
-        # Compare the lists of safe moves with moves made, remove duplicates
-        safe_moves = list(self.safes - self.moves_made)
-        # If no items in safe_moves variable then return none
-        if not safe_moves:
+        # (the safe cells not yet moved to are kept as cells are marked)
+        if not self.safe_moves:
             return None
         # Otherwise return a random choice of the possible safe moves
-        return random.choice(safe_moves)
+        return self.safe_moves.choice()
 
     def make_random_move(self):
         """
@@ -367,27 +670,68 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        # Establish known dimensions of the board
-        rows = self.height
-        cols = self.width
-        # Create empty list for possible moves
-        possible_moves = []
-        # Iterate over the rows
-        for i in range(rows):
-            # Iterate over the columns in row
-            for j in range(cols):
-                # Move is the current cell
-                move = (i, j)
-                # If the move is already done, or in the list of known mines then skip to next cell
-                if move in self.moves_made or move in self.mines:
-                    continue
-                # Otherwise add the cell to a list of potential moves that can be made
-                else:
-                    possible_moves.append(move)
-
         # If there are no possible moves then return None
-        if not possible_moves:
+        # (the cells not chosen and not mines are kept as cells are marked)
+        if not self.candidates:
             return None
-        # Otherwise return a random selection of a move from the list
-        return random.choice(possible_moves)
+        # Otherwise return a random selection of a move
+        if not self.best_guess:
+            return self.candidates.choice()
+        # Or a random selection among the moves least likely to be mines
+        return self.safest_move()
+
+    def safest_move(self):
+        """
+        Returns a random move among those with the lowest probability
+        of being a mine given the knowledge base. Only frontier cells
+        are looked at one by one, as all the others share a probability.
+        """
+        # Known safe cells carry no risk at all
+        if self.safe_moves:
+            return self.safe_moves.choice()
+
+        # Forget old components rather than let the cache grow unbounded
+        if len(self.probability_cache) > 10000:
+            self.probability_cache.clear()
+
+        mines_left = None
+        if self.total_mines is not None:
+            mines_left = self.total_mines - len(self.mines)
+        probabilities, interior_probability = frontier_probabilities(
+            self.knowledge, len(self.candidates), mines_left=mines_left,
+            time_budget=self.guess_budget, cache=self.probability_cache
+        )
+        interior = len(self.candidates) - len(probabilities)
+
+        lowest = min(probabilities.values(), default=interior_probability)
+        if interior:
+            lowest = min(lowest, interior_probability)
+        best = [move for move, probability in probabilities.items()
+                if probability <= lowest + 1e-9]
+        if not interior or interior_probability > lowest + 1e-9:
+            return random.choice(best)
+
+        # Choose uniformly among the best frontier and all interior cells
+        choice = random.randrange(len(best) + interior)
+        if choice < len(best):
+            return best[choice]
+        # Draw candidates until one is off the frontier, unless few are
+        if 4 * interior < len(self.candidates):
+            return random.choice([move for move in self.candidates
+                                  if move not in probabilities])
+        while True:
+            move = self.candidates.choice()
+            if move not in probabilities:
+                return move
+
+
+class BitMinesweeperAI(MinesweeperAI):
+    """
+    Minesweeper game player whose knowledge is made of BitSentences
+    """
+
+    def new_sentence(self, cells, count):
+        return BitSentence(cells, count, self.width)
 
+    def index_key(self, cell):
+        return cell[0] * self.width + cell[1]
@@ -0,0 +1,259 @@
+import math
+import time
+
+# Largest component enumerated exactly; bigger ones use the local estimate
+MAX_COMPONENT = 400
+
+
+class OutOfTime(Exception):
+    pass
+
+
+def components(knowledge):
+    """
+    Split the constraints of the knowledge base into independent groups,
+    two sentences being in the same group if they (transitively) share
+    a cell. Returns a list of (cells, constraints) pairs, where cells is
+    a sorted list and constraints a list of (frozenset of cells, count).
+    """
+    # Union-find over cells
+    parent = {}
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    constraints = set()
+    for sentence in knowledge:
+        cells = frozenset(sentence.cells)
+        if not cells:
+            continue
+        constraints.add((cells, sentence.count))
+        first = None
+        for cell in cells:
+            parent.setdefault(cell, cell)
+            if first is None:
+                first = find(cell)
+            else:
+                root = find(cell)
+                if root != first:
+                    parent[root] = first
+
+    groups = {}
+    for cells, count in constraints:
+        root = find(next(iter(cells)))
+        groups.setdefault(root, []).append((cells, count))
+
+    result = []
+    for group in groups.values():
+        cells = sorted(set().union(*[cells for cells, _ in group]))
+        result.append((cells, sorted(group, key=lambda c: sorted(c[0]))))
+    return result
+
+
+def enumerate_component(cells, constraints, deadline=None):
+    """
+    Enumerate every assignment of mines to `cells` satisfying all
+    `constraints`, by backtracking with constraint checks at each step.
+
+    Returns a dict mapping each possible number of mines k to a pair
+    (number of solutions with k mines, list of how many of those
+    solutions have a mine in each cell). Raises OutOfTime if `deadline`
+    (a time.perf_counter() value) passes first.
+    """
+    position = {cell: i for i, cell in enumerate(cells)}
+
+    # For each constraint: its count, mines placed so far, cells left
+    counts = [count for _, count in constraints]
+    placed = [0] * len(constraints)
+    left = [len(members) for members, _ in constraints]
+    cell_constraints = [[] for _ in cells]
+    for c, (members, _) in enumerate(constraints):
+        for cell in members:
+            cell_constraints[position[cell]].append(c)
+
+    assignment = [0] * len(cells)
+    results = {}
+    steps = 0
+
+    def assign(i, mine):
+        """Assigns cell i, returning False if a constraint is broken."""
+        ok = True
+        for c in cell_constraints[i]:
+            left[c] -= 1
+            placed[c] += mine
+            if placed[c] > counts[c] or placed[c] + left[c] < counts[c]:
+                ok = False
+        assignment[i] = mine
+        return ok
+
+    def unassign(i, mine):
+        for c in cell_constraints[i]:
+            left[c] += 1
+            placed[c] -= mine
+
+    def backtrack(i, mines):
+        nonlocal steps
+        steps += 1
+        if deadline is not None and steps % 1024 == 0 \
+                and time.perf_counter() > deadline:
+            raise OutOfTime()
+
+        # Every cell assigned: record the solution
+        if i == len(cells):
+            result = results.setdefault(mines, [0, [0] * len(cells)])
+            result[0] += 1
+            cell_mines = result[1]
+            for j, mine in enumerate(assignment):
+                cell_mines[j] += mine
+            return
+
+        for mine in (0, 1):
+            if assign(i, mine):
+                backtrack(i + 1, mines + mine)
+            unassign(i, mine)
+
+    backtrack(0, 0)
+    return {k: (solutions, cell_mines) for k, (solutions, cell_mines) in results.items()}
+
+
+def local_estimate(cells, constraints):
+    """
+    Estimate each cell's mine probability as the highest density among
+    the constraints containing it, for components too big to enumerate.
+    """
+    estimate = {cell: 0.0 for cell in cells}
+    for members, count in constraints:
+        density = count / len(members)
+        for cell in members:
+            estimate[cell] = max(estimate[cell], density)
+    return estimate
+
+
+def multiply(p, q):
+    """
+    Multiplies two polynomials given as dicts of power to coefficient.
+    """
+    product = {}
+    for i, a in p.items():
+        for j, b in q.items():
+            product[i + j] = product.get(i + j, 0) + a * b
+    return product
+
+
+def frontier_probabilities(knowledge, unknown_count, mines_left=None,
+                           time_budget=None, cache=None):
+    """
+    Return a dict of the probability that each frontier cell (each cell
+    in some sentence of `knowledge`) is a mine, and the probability
+    shared by every other unknown cell, of which there are
+    `unknown_count` less the frontier cells.
+
+    The frontier is split into independent components, each enumerated
+    exactly, with results memoised in the dict `cache` by their
+    constraints. If `mines_left`, the number of mines not yet
+    identified, is known, solutions are weighted by the ways to place
+    the remaining mines among the other unknown cells; otherwise each
+    component's solutions are weighted equally and cells off the
+    frontier are given the average frontier probability. Components
+    that cannot be enumerated within `time_budget` seconds fall back to
+    a local density estimate.
+    """
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    if cache is None:
+        cache = {}
+
+    probabilities = {}
+    exact = []
+    exact_cells = set()
+    for cells, constraints in components(knowledge):
+        key = tuple(constraints)
+        results = cache.get(key)
+        if results is None and len(cells) <= MAX_COMPONENT:
+            # Only memoise complete results: running out of time on this
+            # move says nothing about the next, which may have more
+            try:
+                results = cache[key] = enumerate_component(cells, constraints, deadline)
+            except OutOfTime:
+                pass
+        if results is None:
+            probabilities.update(local_estimate(cells, constraints))
+        else:
+            exact.append((cells, results))
+            exact_cells.update(cells)
+
+    if mines_left is None:
+        # Treat components as independent, each solution equally likely
+        for cells, results in exact:
+            total = sum(solutions for solutions, _ in results.values())
+            for i, cell in enumerate(cells):
+                mines = sum(cell_mines[i] for _, cell_mines in results.values())
+                probabilities[cell] = mines / total
+        frontier = list(probabilities.values())
+        interior_probability = sum(frontier) / len(frontier) if frontier else 0.5
+
+    else:
+        # Mines not in an exact component go among the other unknown cells
+        # (interior cells and cells of estimated components alike)
+        free_cells = unknown_count - len(exact_cells)
+
+        polynomials = [{k: solutions for k, (solutions, _) in results.items()}
+                       for _, results in exact]
+        everything = {0: 1}
+        for polynomial in polynomials:
+            everything = multiply(everything, polynomial)
+
+        # weights[s]: ways to place the remaining mines among the free cells
+        # if the exact components hold s mines, scaled to avoid overflow
+        logs = []
+        for s in range(max(everything) + 1):
+            remaining = mines_left - s
+            if 0 <= remaining <= free_cells:
+                logs.append(math.lgamma(free_cells + 1) - math.lgamma(remaining + 1)
+                            - math.lgamma(free_cells - remaining + 1))
+            else:
+                logs.append(None)
+        largest = max((log for log in logs if log is not None), default=0.0)
+        weights = [0.0 if log is None else math.exp(log - largest) for log in logs]
+
+        def weight(s):
+            return weights[s] if s < len(weights) else 0.0
+
+        total = sum(ways * weight(s) for s, ways in everything.items())
+
+        for index, (cells, results) in enumerate(exact):
+            # Ways for all the other components together
+            others = {0: 1}
+            for other, polynomial in enumerate(polynomials):
+                if other != index:
+                    others = multiply(others, polynomial)
+            combined = {k: sum(ways * weight(k + s) for s, ways in others.items())
+                        for k in results}
+            for i, cell in enumerate(cells):
+                mines = sum(cell_mines[i] * combined[k]
+                            for k, (_, cell_mines) in results.items())
+                probabilities[cell] = mines / total if total else 0.5
+
+        if free_cells and total:
+            expected = sum(ways * weight(s) * (mines_left - s)
+                           for s, ways in everything.items())
+            interior_probability = expected / total / free_cells
+        else:
+            interior_probability = 0.5 if free_cells else 0.0
+
+    return probabilities, interior_probability
+
+
+def mine_probabilities(knowledge, unknown, mines_left=None,
+                       time_budget=None, cache=None):
+    """
+    Return a dict of the probability that each cell in `unknown` is a
+    mine, given the sentences in `knowledge`. Every frontier cell must
+    be in `unknown`. See frontier_probabilities.
+    """
+    probabilities, interior_probability = frontier_probabilities(
+        knowledge, len(unknown), mines_left, time_budget, cache
+    )
+    return {cell: probabilities.get(cell, interior_probability) for cell in unknown}
@@ -0,0 +1,160 @@
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+# Board configurations to simulate: (height, width, mine density)
+CONFIGS = [
+    (8, 8, 0.125),
+    (16, 16, 0.156),
+    (16, 30, 0.206)
+]
+
+
+def play_game(height, width, mines, seed=0, ai_options=None, flood_fill=False):
+    """
+    Play one game of Minesweeper with the AI, without a display.
+    The AI loses if it moves onto a mine, and wins once every safe
+    cell has been revealed. With `flood_fill`, a move onto a cell with
+    no nearby mines reveals its whole region, given to the AI in one batch.
+
+    Return a dict with whether it won, the number of moves made and
+    random moves among them, the total and worst time spent in
+    add_knowledge, and the largest and average knowledge base size.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, total_mines=mines,
+                       **(ai_options or {}))
+
+    result = {
+        "won": False,
+        "moves": 0,
+        "guesses": 0,
+        "inference_time": 0.0,
+        "max_inference_time": 0.0,
+        "max_knowledge": 0,
+        "total_knowledge": 0
+    }
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            if move is None:
+                break
+            result["guesses"] += 1
+        result["moves"] += 1
+        if game.is_mine(move):
+            return result
+
+        start = time.perf_counter()
+        if flood_fill:
+            ai.add_knowledge_batch(game.reveal_region(move))
+        else:
+            ai.add_knowledge(move, game.nearby_mines(move))
+        elapsed = time.perf_counter() - start
+
+        result["inference_time"] += elapsed
+        result["max_inference_time"] = max(result["max_inference_time"], elapsed)
+        result["max_knowledge"] = max(result["max_knowledge"], len(ai.knowledge))
+        result["total_knowledge"] += len(ai.knowledge)
+
+        # Won once every cell that is not a mine has been revealed
+        if len(ai.moves_made) + mines == height * width:
+            break
+
+    result["won"] = True
+    return result
+
+
+def play_games(height, width, mines, seeds, ai_options=None, flood_fill=False):
+    """
+    Play one game per seed on the same board configuration.
+    """
+    return [play_game(height, width, mines, seed, ai_options, flood_fill)
+            for seed in seeds]
+
+
+def summarise(results):
+    """
+    Combine the results of many games into win rate and averages.
+    """
+    games = len(results)
+    moves = sum(result["moves"] for result in results)
+    return {
+        "games": games,
+        "win_rate": sum(result["won"] for result in results) / games,
+        "moves": moves / games,
+        "guesses": sum(result["guesses"] for result in results) / games,
+        "inference_ms": 1000 * sum(result["inference_time"] for result in results)
+                        / max(moves, 1),
+        "max_inference_ms": 1000 * max(result["max_inference_time"] for result in results),
+        "max_knowledge": max(result["max_knowledge"] for result in results),
+        "knowledge": sum(result["total_knowledge"] for result in results)
+                     / max(moves, 1)
+    }
+
+
+def simulate(configs=CONFIGS, games=1000, processes=None, seed=0,
+             ai_options=None, flood_fill=False, batch=50):
+    """
+    Play `games` games on each (height, width, density) configuration,
+    spread in batches across a pool of `processes` worker processes
+    (all available CPUs by default). Game i of a configuration uses
+    seed `seed + i`, so runs are reproducible.
+
+    Return a list of (configuration, summary) pairs.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    jobs = []
+    for height, width, density in configs:
+        mines = max(1, round(height * width * density))
+        for start in range(seed, seed + games, batch):
+            seeds = range(start, min(start + batch, seed + games))
+            jobs.append(((height, width, density),
+                         (height, width, mines, seeds, ai_options, flood_fill)))
+
+    if processes <= 1:
+        outcomes = [play_games(*arguments) for _, arguments in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(play_games, *arguments) for _, arguments in jobs]
+            outcomes = [future.result() for future in futures]
+
+    results = {}
+    for (config, _), outcome in zip(jobs, outcomes):
+        results.setdefault(config, []).extend(outcome)
+    return [(config, summarise(results[config])) for config in configs]
+
+
+def report(summaries):
+    """
+    Print a table of simulation summaries.
+    """
+    print(f"{'board':<18}{'games':>7}{'win %':>8}{'moves':>8}{'guesses':>9}"
+          f"{'ms/move':>9}{'max ms':>9}{'kb':>7}{'max kb':>8}")
+    for (height, width, density), summary in summaries:
+        print(f"{f'{height}x{width} @ {density:.3f}':<18}{summary['games']:>7}"
+              f"{100 * summary['win_rate']:>8.1f}{summary['moves']:>8.1f}"
+              f"{summary['guesses']:>9.2f}{summary['inference_ms']:>9.3f}"
+              f"{summary['max_inference_ms']:>9.3f}{summary['knowledge']:>7.1f}"
+              f"{summary['max_knowledge']:>8}")
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python simulate.py [games] [processes]")
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    start = time.perf_counter()
+    report(simulate(games=games, processes=processes))
+    print(f"Simulated in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
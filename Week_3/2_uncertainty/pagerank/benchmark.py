@@ -0,0 +1,359 @@
+import os
+import random
+import tempfile
+import time
+
+from crawler import crawl_parallel
+from diskgraph import DiskGraph, disk_pagerank, write_corpus as write_graph_file
+from incremental import affected_pages, converge_region, warm_start
+from pagerank import DAMPING, SAMPLES, crawl, iterate_pagerank, sample_pagerank
+from personalized import personalized_iterate, teleport_vector
+from sampling import parallel_walk, sparse_sample_pagerank
+from sparse import LinkGraph, power_iterate, sparse_pagerank
+
+# Corpus sizes to measure, in pages
+SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+
+
+def random_corpus(pages, links=8, seed=0):
+    """
+    Return a random corpus of `pages` pages named 0.html, 1.html, ...
+    Each page links to between 0 and 2 * `links` other pages chosen
+    uniformly, so some pages have no links at all.
+    """
+    rng = random.Random(seed)
+    names = [f"{i}.html" for i in range(pages)]
+    corpus = {}
+    for i, name in enumerate(names):
+        count = min(rng.randint(0, 2 * links), pages - 1)
+        targets = set(rng.sample(range(pages), count)) - {i}
+        corpus[name] = {names[j] for j in targets}
+    return corpus
+
+
+def write_corpus(corpus, directory):
+    """
+    Write a corpus out as HTML pages that crawl would read back as it.
+    """
+    for page, links in corpus.items():
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html>\n<head>\n<title>{page}</title>\n"
+                    f"</head>\n<body>\n<h1>{page}</h1>\n")
+            for link in sorted(links):
+                f.write(f'<p>See <a href="{link}">{link}</a>.</p>\n')
+            f.write("</body>\n</html>\n")
+
+
+def largest_difference(ranks, other):
+    return max(abs(ranks[page] - other[page]) for page in ranks)
+
+
+def measure_engines(sizes=SIZES, budget=10.0):
+    """
+    Time iterate_pagerank against the sparse engine on random corpora,
+    checking they agree. The quadratic iterate_pagerank is skipped once
+    it has taken more than `budget` seconds on a smaller corpus.
+    """
+    print("PageRank by iteration: iterate_pagerank vs. sparse engine")
+    print(f"  {'pages':>9}{'links':>10}{'dense s':>10}{'sparse s':>10}{'difference':>12}")
+    dense_time = 0.0
+    for size in sizes:
+        corpus = random_corpus(size)
+        links = sum(len(targets) for targets in corpus.values())
+
+        start = time.perf_counter()
+        ranks = sparse_pagerank(corpus, DAMPING)
+        sparse_time = time.perf_counter() - start
+
+        if dense_time > budget:
+            print(f"  {size:>9}{links:>10}{'-':>10}{sparse_time:>10.3f}{'-':>12}")
+            continue
+        start = time.perf_counter()
+        expected = iterate_pagerank(corpus, DAMPING)
+        dense_time = time.perf_counter() - start
+        print(f"  {size:>9}{links:>10}{dense_time:>10.3f}{sparse_time:>10.3f}"
+              f"{largest_difference(ranks, expected):>12.1e}")
+
+
+def measure_sampling(sizes=(10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5), n=SAMPLES,
+                     walkers=1000, budget=10.0):
+    """
+    Time sample_pagerank against the constant-time-step sampler, with
+    one surfer and with many, on random corpora, giving each one's
+    largest error against the converged ranks. sample_pagerank is
+    skipped once it has taken more than `budget` seconds.
+    """
+    print(f"PageRank by sampling (n = {n}): sample_pagerank vs. sparse sampler")
+    print(f"  {'pages':>9}{'dense s':>10}{'error':>8}{'walk s':>10}{'error':>8}"
+          f"{'walkers s':>11}{'error':>8}")
+    dense_time = 0.0
+    for size in sizes:
+        corpus = random_corpus(size)
+        expected = sparse_pagerank(corpus, DAMPING, threshold=1e-10)
+        row = f"  {size:>9}"
+        if dense_time > budget:
+            row += f"{'-':>10}{'-':>8}"
+        else:
+            start = time.perf_counter()
+            ranks = sample_pagerank(corpus, DAMPING, n)
+            dense_time = time.perf_counter() - start
+            row += f"{dense_time:>10.3f}{largest_difference(ranks, expected):>8.4f}"
+        for count, width in ((1, 10), (walkers, 11)):
+            start = time.perf_counter()
+            ranks = sparse_sample_pagerank(corpus, DAMPING, n, walkers=count)
+            row += (f"{time.perf_counter() - start:>{width}.3f}"
+                    f"{largest_difference(ranks, expected):>8.4f}")
+        print(row)
+
+
+def measure_parallel_sampling(size=10 ** 4, sample_sizes=(10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7),
+                              processes=None, seed=0):
+    """
+    Sample a random corpus with more and more samples, in one process
+    and across `processes`, reporting the largest and total absolute
+    error against the ranks iterate_pagerank converges to (computed to
+    1e-10, as its own 0.001 threshold stops too early on big corpora).
+    """
+    graph = LinkGraph.from_corpus(random_corpus(size))
+    graph.outgoing()
+    expected = power_iterate(graph, DAMPING, threshold=1e-10)
+
+    print(f"Parallel sampling: error against iterated ranks ({size} pages)")
+    print(f"  {'samples':>10}{'serial s':>10}{'parallel s':>12}{'max error':>11}{'total error':>13}")
+    for n in sample_sizes:
+        start = time.perf_counter()
+        serial = parallel_walk(graph, DAMPING, n, processes=1, seed=seed)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        counts = parallel_walk(graph, DAMPING, n, processes=processes, seed=seed)
+        parallel_time = time.perf_counter() - start
+        if counts != serial:
+            raise ValueError("parallel sampling did not reproduce the serial counts")
+
+        errors = [abs(count / n - rank) for count, rank in zip(counts, expected)]
+        print(f"  {n:>10}{serial_time:>10.3f}{parallel_time:>12.3f}"
+              f"{max(errors):>11.6f}{sum(errors):>13.4f}")
+
+
+def measure_crawling(sizes=(10 ** 3, 10 ** 4, 10 ** 5), processes=None, edits=10):
+    """
+    Time crawl against crawl_parallel on corpora written to disk: with
+    no cache, with an up-to-date cache, and after `edits` pages change.
+    """
+    print("Crawling: crawl vs. parallel crawler with link cache")
+    print(f"  {'pages':>9}{'crawl s':>10}{'cold s':>10}{'cached s':>10}"
+          f"{'edited s':>10}{'parsed':>8}")
+    for size in sizes:
+        corpus = random_corpus(size)
+        with tempfile.TemporaryDirectory() as directory:
+            pages = os.path.join(directory, "corpus")
+            os.mkdir(pages)
+            write_corpus(corpus, pages)
+            cache_file = os.path.join(directory, "links.json")
+
+            start = time.perf_counter()
+            expected = crawl(pages)
+            row = f"  {size:>9}{time.perf_counter() - start:>10.3f}"
+
+            for _ in range(2):
+                start = time.perf_counter()
+                if crawl_parallel(pages, cache_file, processes) != expected:
+                    raise ValueError("crawl_parallel disagreed with crawl")
+                row += f"{time.perf_counter() - start:>10.3f}"
+
+            # Rewrite some pages, moving their modification times on
+            edited = random.Random(size).sample(list(corpus), min(edits, size))
+            for page in edited:
+                corpus[page] = set(list(corpus)[:3]) - {page}
+            write_corpus({page: corpus[page] for page in edited}, pages)
+            for page in edited:
+                path = os.path.join(pages, page)
+                info = os.stat(path)
+                os.utime(path, ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+
+            expected = crawl(pages)
+            stats = {}
+            start = time.perf_counter()
+            if crawl_parallel(pages, cache_file, processes, stats) != expected:
+                raise ValueError("crawl_parallel disagreed with crawl after edits")
+            print(f"{row}{time.perf_counter() - start:>10.3f}{stats['parsed']:>8}")
+
+
+def edit_corpus(corpus, edits, seed=0):
+    """
+    Return a copy of a corpus with `edits` pages given new links, one
+    page removed and one page added. If any page has no links, one of
+    them gains links, so the set of pages with no links changes too.
+    """
+    rng = random.Random(seed)
+    corpus = {page: set(links) for page, links in corpus.items()}
+    pages = list(corpus)
+    for page in rng.sample(pages, edits):
+        corpus[page] = set(rng.sample(pages, rng.randint(0, 16))) - {page}
+    dangling = [page for page in pages if not corpus[page]]
+    if dangling:
+        page = rng.choice(dangling)
+        corpus[page] = set(rng.sample(pages, 8)) - {page}
+
+    removed = pages[-1]
+    del corpus[removed]
+    for links in corpus.values():
+        links.discard(removed)
+    corpus["new.html"] = set(rng.sample(pages[:-1], 8))
+    corpus[pages[0]].add("new.html")
+    return corpus
+
+
+def measure_incremental(size=10 ** 5, edits=(1, 10, 100, 1000), threshold=1e-9):
+    """
+    After editing a random corpus, compare solving from uniform ranks,
+    from the old ranks, and from the old ranks recomputing only the
+    region around the edits: iterations (or rounds), page updates,
+    seconds (not counting building the link graph, common to all) and
+    largest difference from the cold-start ranks.
+    """
+    corpus = random_corpus(size)
+    old_ranks = dict(zip(corpus, power_iterate(LinkGraph.from_corpus(corpus), DAMPING,
+                                                threshold)))
+
+    print(f"Incremental PageRank after edits ({size} pages)")
+    print(f"  {'edits':>6}{'mode':>12}{'rounds':>8}{'updates':>10}{'seconds':>9}{'difference':>12}")
+    for count in edits:
+        new_corpus = edit_corpus(corpus, count, seed=count)
+        graph = LinkGraph.from_corpus(new_corpus)
+
+        stats = {}
+        start = time.perf_counter()
+        cold = power_iterate(graph, DAMPING, threshold, stats=stats)
+        print(f"  {count:>6}{'cold':>12}{stats['iterations']:>8}{stats['updates']:>10}"
+              f"{time.perf_counter() - start:>9.3f}{'-':>12}")
+
+        start = time.perf_counter()
+        ranks = power_iterate(graph, DAMPING, threshold, warm_start(graph, old_ranks), stats)
+        print(f"  {count:>6}{'warm':>12}{stats['iterations']:>8}{stats['updates']:>10}"
+              f"{time.perf_counter() - start:>9.3f}"
+              f"{max(map(abs, (a - b for a, b in zip(ranks, cold)))):>12.1e}")
+
+        start = time.perf_counter()
+        ranks = converge_region(graph, DAMPING, warm_start(graph, old_ranks),
+                                affected_pages(graph, corpus, new_corpus, DAMPING, threshold),
+                                threshold, stats)
+        print(f"  {count:>6}{'incremental':>12}{stats['rounds']:>8}{stats['updates']:>10}"
+              f"{time.perf_counter() - start:>9.3f}"
+              f"{max(map(abs, (a - b for a, b in zip(ranks, cold)))):>12.1e}")
+
+
+def measure_solvers(size=10 ** 4, thresholds=(1e-4, 1e-8, 1e-12), leaking=100):
+    """
+    Compare the sparse solvers and extrapolations on a random corpus,
+    in which `leaking` pages also link outside the corpus: iterations,
+    seconds and largest error against the ranks converged to 1e-14,
+    at each threshold on the total change (L1 norm), then the change
+    made by each iteration at the middle threshold.
+    """
+    corpus = random_corpus(size)
+    for page in list(corpus)[:leaking]:
+        corpus[page].add("outside.html")
+    graph = LinkGraph.from_corpus(corpus)
+    expected = power_iterate(graph, DAMPING, threshold=1e-14, norm="l1")
+
+    solvers = [(method, extrapolation)
+               for method in ("jacobi", "gauss-seidel")
+               for extrapolation in (None, "aitken", "quadratic")]
+    print(f"Solvers ({size} pages, {leaking} linking outside)")
+    print(f"  {'method':<14}{'extrapolation':<15}{'threshold':>10}{'iterations':>12}"
+          f"{'seconds':>9}{'error':>9}")
+    residuals = {}
+    for method, extrapolation in solvers:
+        for threshold in thresholds:
+            stats = {}
+            start = time.perf_counter()
+            ranks = power_iterate(graph, DAMPING, threshold, stats=stats, norm="l1",
+                                  method=method, extrapolation=extrapolation)
+            elapsed = time.perf_counter() - start
+            error = max(map(abs, (a - b for a, b in zip(ranks, expected))))
+            print(f"  {method:<14}{str(extrapolation):<15}{threshold:>10.0e}"
+                  f"{stats['iterations']:>12}{elapsed:>9.3f}{error:>9.1e}")
+            if threshold == thresholds[len(thresholds) // 2]:
+                residuals[method, extrapolation] = stats["residuals"]
+
+    print(f"  Change made by each iteration (threshold {thresholds[len(thresholds) // 2]:.0e})")
+    for (method, extrapolation), changes in residuals.items():
+        print(f"  {method:<14}{str(extrapolation):<15}"
+              + " ".join(f"{change:.0e}" for change in changes))
+
+
+def measure_personalized(size=10 ** 4, counts=(1, 10, 50), topic=20, threshold=1e-8):
+    """
+    Time personalised PageRank for many teleport vectors, each jumping
+    to its own `topic` random pages, solved one at a time and together.
+    """
+    corpus = random_corpus(size)
+    graph = LinkGraph.from_corpus(corpus)
+    rng = random.Random(0)
+    pages = list(corpus)
+
+    print(f"Personalised PageRank: one vector at a time vs. batched ({size} pages)")
+    print(f"  {'vectors':>8}{'separate s':>12}{'batched s':>11}{'difference':>12}")
+    for count in counts:
+        teleports = [teleport_vector(graph, {page: 1 for page in rng.sample(pages, topic)})
+                     for _ in range(count)]
+        start = time.perf_counter()
+        separate = [personalized_iterate(graph, DAMPING, [teleport], threshold)[0]
+                    for teleport in teleports]
+        separate_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = personalized_iterate(graph, DAMPING, teleports, threshold)
+        batched_time = time.perf_counter() - start
+
+        difference = max(abs(a - b) for one, other in zip(separate, batched)
+                         for a, b in zip(one, other))
+        print(f"  {count:>8}{separate_time:>12.3f}{batched_time:>11.3f}{difference:>12.1e}")
+
+
+def measure_disk(sizes=(10 ** 4, 10 ** 5, 10 ** 6), threshold=1e-8):
+    """
+    Time writing corpora to a memory-mapped graph file and running
+    disk_pagerank on it, against sparse_pagerank on the whole graph
+    in memory, and compare their ranks.
+    """
+    print("Disk graph: memory-mapped block iteration vs. sparse_pagerank")
+    print(f"  {'pages':>9}{'file MB':>9}{'write s':>10}{'disk s':>10}"
+          f"{'sparse s':>10}{'max diff':>11}")
+    for size in sizes:
+        corpus = random_corpus(size)
+        with tempfile.TemporaryDirectory() as directory:
+            graph_file = os.path.join(directory, "corpus.graph")
+            start = time.perf_counter()
+            write_graph_file(graph_file, corpus)
+            written = time.perf_counter() - start
+            megabytes = os.path.getsize(graph_file) / 2 ** 20
+
+            with DiskGraph(graph_file) as graph:
+                start = time.perf_counter()
+                ranks = disk_pagerank(graph, DAMPING, threshold)
+                disk = time.perf_counter() - start
+                ranks = dict(zip(graph.pages(), ranks))
+
+        start = time.perf_counter()
+        expected = sparse_pagerank(corpus, DAMPING, threshold)
+        sparse = time.perf_counter() - start
+        print(f"  {size:>9}{megabytes:>9.1f}{written:>10.3f}{disk:>10.3f}"
+              f"{sparse:>10.3f}{largest_difference(ranks, expected):>11.2e}")
+
+
+def main():
+    measure_engines()
+    measure_solvers()
+    measure_sampling()
+    measure_parallel_sampling()
+    measure_crawling()
+    measure_incremental()
+    measure_personalized()
+    measure_disk()
+
+
+if __name__ == "__main__":
+    main()
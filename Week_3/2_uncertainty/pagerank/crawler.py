@@ -0,0 +1,158 @@
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from diskgraph import write_graph
+
+# Links as crawl finds them
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# The start of a link cut off at the end of a block of text
+PARTIAL_LINK = re.compile(r"<(?:a(?:\s[^>]*)?)?\Z|<a\s[^>]*?href=\"[^\"]*\Z")
+
+# Version of the cache file format
+CACHE_VERSION = 1
+
+
+def read_links(path, block_size=1 << 16):
+    """
+    Return the list of links in the HTML file at `path`, found by the
+    same regular expression as crawl, reading the file `block_size`
+    characters at a time. Any text that could still be the start of
+    a link is carried over into the next block.
+    """
+    links = []
+    carried = ""
+    with open(path) as f:
+        block = f.read(block_size)
+        while block:
+            following = f.read(block_size)
+            text = carried + block
+            if not following:
+                links.extend(LINK.findall(text))
+                break
+            end = 0
+            for match in LINK.finditer(text):
+                links.append(match.group(1))
+                end = match.end()
+            partial = PARTIAL_LINK.search(text, end)
+            carried = text[partial.start():] if partial else ""
+            block = following
+    return links
+
+
+def parse_page(path):
+    """
+    Return the set of links in the HTML file at `path`, other than
+    links to itself.
+    """
+    return set(read_links(path)) - {os.path.basename(path)}
+
+
+def load_cache(cache_file):
+    """
+    Return the pages recorded in a cache file, as a dict of filename
+    to [modification time, size, list of links], or an empty dict if
+    the file does not exist or is from another version.
+    """
+    try:
+        with open(cache_file) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data["pages"]
+
+
+def save_cache(cache_file, pages):
+    """
+    Write pages, as returned by load_cache, to a cache file. The file
+    is replaced in one step so an interrupted write leaves the old one.
+    """
+    temporary = f"{cache_file}.tmp"
+    with open(temporary, "w") as f:
+        # json.dumps encodes in C, where json.dump writes piece by piece
+        f.write(json.dumps({"version": CACHE_VERSION, "pages": pages}))
+    os.replace(temporary, cache_file)
+
+
+def crawl_parallel(directory, cache_file=None, processes=None, stats=None):
+    """
+    Return the same dictionary as crawl, parsing the pages on a pool
+    of `processes` worker processes (all available CPUs by default;
+    1 parses in this process) and streaming each file.
+
+    If `cache_file` is given, the links found on each page are stored
+    there with the file's modification time and size, and on later
+    runs only pages that are new or have changed are parsed again.
+    If `stats` is a dict, the numbers of pages parsed and taken from
+    the cache are recorded in it.
+    """
+    cached = load_cache(cache_file) if cache_file is not None else {}
+
+    # Find the pages whose links need to be read again
+    files = {}
+    stale = []
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(".html"):
+            continue
+        info = entry.stat()
+        files[entry.name] = (info.st_mtime_ns, info.st_size)
+        record = cached.get(entry.name)
+        if record is None or (record[0], record[1]) != files[entry.name]:
+            stale.append(entry.name)
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(stale))
+    paths = [os.path.join(directory, filename) for filename in stale]
+    if processes <= 1:
+        parsed = map(parse_page, paths)
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            parsed = list(executor.map(parse_page, paths,
+                                       chunksize=max(1, len(paths) // (processes * 4))))
+
+    # Keep the cached links of unchanged pages, and forget removed pages
+    links = {filename: cached[filename][2] for filename in files
+             if filename in cached}
+    for filename, page_links in zip(stale, parsed):
+        links[filename] = sorted(page_links)
+
+    if cache_file is not None and (stale or len(cached) != len(files)):
+        save_cache(cache_file, {filename: [*files[filename], links[filename]]
+                                for filename in files})
+    if stats is not None:
+        stats["parsed"] = len(stale)
+        stats["cached"] = len(files) - len(stale)
+
+    # Only include links to other pages in the corpus
+    pages = links.keys()
+    return {filename: pages & links[filename] for filename in files}
+
+
+def crawl_to_graph(directory, graph_file, processes=None):
+    """
+    Parse a directory of HTML pages like crawl, on a pool of
+    `processes` worker processes, writing the link graph to
+    `graph_file` (see diskgraph) as pages are parsed instead of
+    building a dictionary of every page's links. Return the number
+    of pages.
+    """
+    pages = sorted(entry.name for entry in os.scandir(directory)
+                   if entry.name.endswith(".html"))
+    paths = [os.path.join(directory, page) for page in pages]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(paths))
+    if processes <= 1:
+        write_graph(graph_file, pages, map(parse_page, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            write_graph(graph_file, pages, executor.map(
+                parse_page, paths, chunksize=max(1, len(paths) // (processes * 4))
+            ))
+    return len(pages)
@@ -0,0 +1,179 @@
+import array
+import mmap
+import struct
+
+# File layout: a header giving the number of pages and links and where
+# each section starts, then the sections, each aligned to 8 bytes:
+#   links         int32 id of the page each link goes to, page by page
+#   offsets       int64 position in links of each page's first link, and the end
+#   out_degree    int32 number of links on each page, counting links
+#                 to pages outside the corpus, as iterate_pagerank does
+#   name_offsets  int64 position in names of each page's name, and the end
+#   names         page names, UTF-8 encoded, one after another
+MAGIC = b"PRGRAPH1"
+HEADER = struct.Struct("<8s7q")
+
+
+def align(f):
+    """
+    Pads the file with zero bytes to a multiple of 8 bytes.
+    """
+    f.write(bytes(-f.tell() % 8))
+
+
+def write_graph(path, pages, links):
+    """
+    Write a link graph to `path`, given the list of page names and an
+    iterable giving the collection of links on each page, in the same
+    order. The links are read one page at a time, so only the page
+    names and one array per page need to be held in memory.
+    """
+    index = {page: i for i, page in enumerate(pages)}
+    offsets = array.array("q", [0])
+    out_degree = array.array("i")
+    with open(path, "wb") as f:
+        f.write(bytes(HEADER.size))
+
+        links_position = f.tell()
+        for page_links in links:
+            ids = array.array("i", sorted(index[link] for link in page_links if link in index))
+            ids.tofile(f)
+            offsets.append(offsets[-1] + len(ids))
+            out_degree.append(len(page_links))
+        if len(out_degree) != len(pages):
+            raise ValueError("Expected the links of every page")
+        align(f)
+
+        offsets_position = f.tell()
+        offsets.tofile(f)
+        degree_position = f.tell()
+        out_degree.tofile(f)
+        align(f)
+
+        encoded = [page.encode() for page in pages]
+        name_offsets = array.array("q", [0])
+        for name in encoded:
+            name_offsets.append(name_offsets[-1] + len(name))
+        name_offsets_position = f.tell()
+        name_offsets.tofile(f)
+        names_position = f.tell()
+        for name in encoded:
+            f.write(name)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, len(pages), offsets[-1], links_position,
+                            offsets_position, degree_position,
+                            name_offsets_position, names_position))
+
+
+def write_corpus(path, corpus):
+    """
+    Write a corpus, as returned by crawl, to `path` as a link graph.
+    """
+    pages = list(corpus)
+    write_graph(path, pages, (corpus[page] for page in pages))
+
+
+class DiskGraph():
+    """
+    A link graph written by write_graph, memory-mapped so that its
+    arrays are read from disk as they are used rather than loaded.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.size, self.link_count, links_position, offsets_position,
+         degree_position, name_offsets_position, names_position) = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a link graph file")
+
+        view = memoryview(self.map)
+        self.links = view[links_position:links_position + 4 * self.link_count].cast("i")
+        self.offsets = view[offsets_position:offsets_position + 8 * (self.size + 1)].cast("q")
+        self.out_degree = view[degree_position:degree_position + 4 * self.size].cast("i")
+        self.name_offsets = view[name_offsets_position:
+                                 name_offsets_position + 8 * (self.size + 1)].cast("q")
+        self.names_position = names_position
+
+    def __len__(self):
+        return self.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for view in (self.links, self.offsets, self.out_degree, self.name_offsets):
+            view.release()
+        self.map.close()
+
+    def name(self, i):
+        """
+        Return the name of page i.
+        """
+        start = self.names_position + self.name_offsets[i]
+        end = self.names_position + self.name_offsets[i + 1]
+        return self.map[start:end].decode()
+
+    def pages(self):
+        """
+        Return an iterator over the names of all pages, in id order.
+        """
+        return (self.name(i) for i in range(self.size))
+
+
+def disk_pagerank(graph, damping_factor, threshold=0.001, block_size=1 << 16, stats=None):
+    """
+    Return an array of the PageRank of each page of a DiskGraph, by the
+    same iteration as iterate_pagerank, until no rank changes by more
+    than `threshold`.
+
+    Each iteration reads the link arrays from disk in blocks of
+    `block_size` pages, passing each page's rank along its links into
+    the array that becomes the new ranks, so only the old and new rank
+    arrays are kept in memory. If `stats` is a dict, the number of
+    iterations is recorded in it.
+    """
+    n = len(graph)
+    if n == 0:
+        raise ValueError("No pages in corpus")
+    offsets = graph.offsets
+    links = graph.links
+    out_degree = graph.out_degree
+
+    ranks = array.array("d", [1 / n]) * n
+    iterations = 0
+    change = 1
+    while change > threshold:
+        iterations += 1
+        linked = array.array("d", bytes(8 * n))
+        dangling = 0.0
+        for start in range(0, n, block_size):
+            end = min(start + block_size, n)
+            first = offsets[start]
+            block = links[first:offsets[end]].tolist()
+            block_offsets = offsets[start:end + 1].tolist()
+            for i, degree in enumerate(out_degree[start:end].tolist(), start):
+                if degree == 0:
+                    dangling += ranks[i]
+                    continue
+                share = ranks[i] / degree
+                for target in block[block_offsets[i - start] - first:
+                                    block_offsets[i - start + 1] - first]:
+                    linked[target] += share
+
+        teleport = (1 - damping_factor) / n + damping_factor * dangling / n
+        # Turn the rank passed along links into the new ranks in place
+        change = 0.0
+        for i in range(n):
+            rank = teleport + damping_factor * linked[i]
+            change = max(change, abs(rank - ranks[i]))
+            linked[i] = rank
+        ranks = linked
+
+    if stats is not None:
+        stats["iterations"] = iterations
+    return ranks
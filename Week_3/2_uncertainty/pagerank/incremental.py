@@ -0,0 +1,129 @@
+from sparse import LinkGraph
+
+
+def corpus_changes(old_corpus, new_corpus):
+    """
+    Return the set of pages added, removed, or whose links differ
+    between two corpora, as returned by crawl before and after an edit.
+    """
+    changed = old_corpus.keys() ^ new_corpus.keys()
+    for page, links in new_corpus.items():
+        if page in old_corpus and old_corpus[page] != links:
+            changed.add(page)
+    return changed
+
+
+def warm_start(graph, old_ranks):
+    """
+    Return starting ranks for the pages of `graph`: each page's previous
+    rank if it had one, 1/N for a new page, scaled to sum to 1.
+    """
+    n = len(graph)
+    ranks = [old_ranks.get(page, 1 / n) for page in graph.pages]
+    total = sum(ranks)
+    return [rank / total for rank in ranks]
+
+
+def converge_region(graph, damping_factor, ranks, active, threshold=0.001, stats=None):
+    """
+    Bring `ranks`, a list updated in place, back to convergence after
+    a change to the pages in `active`.
+
+    Each round recomputes the pages in `active` from the current ranks,
+    and the next round only the pages linked to by a page whose rank
+    moved by more than `threshold`, until none did. Rank spread by pages
+    with no links reaches every page, so every page is recomputed once
+    that share has moved by more than `threshold` since they last were.
+    If `stats` is a dict, the number of rounds and of page updates are
+    recorded in it.
+    """
+    n = len(graph)
+    offsets = graph.offsets
+    sources = graph.sources
+    out_degree = graph.out_degree
+    link_offsets, links = graph.outgoing()
+    dangling = set(graph.dangling)
+
+    # Rank passed along each link of every page, kept up to date
+    share = [rank / degree if degree else 0.0 for rank, degree in zip(ranks, out_degree)]
+
+    base = (1 - damping_factor) / n
+    spread = sum(ranks[i] for i in dangling) / n
+    applied = spread
+    rounds = updates = 0
+    while active:
+        rounds += 1
+        updates += len(active)
+        moved = []
+        for i in active:
+            linked = sum(map(share.__getitem__, sources[offsets[i]:offsets[i + 1]]))
+            rank = base + damping_factor * (spread + linked)
+            change = rank - ranks[i]
+            ranks[i] = rank
+            if i in dangling:
+                spread += change / n
+            else:
+                share[i] = rank / out_degree[i]
+            if abs(change) > threshold:
+                moved.append(i)
+
+        # Only pages linked to by a page that moved can move in turn
+        active = set()
+        for i in moved:
+            active.update(links[link_offsets[i]:link_offsets[i + 1]])
+        if damping_factor * abs(spread - applied) > threshold:
+            active = range(n)
+            applied = spread
+
+    if stats is not None:
+        stats["rounds"] = rounds
+        stats["updates"] = updates
+    return ranks
+
+
+def affected_pages(graph, old_corpus, new_corpus, damping_factor, threshold=0.001):
+    """
+    Return the indices in `graph`, the graph of `new_corpus`, of the
+    pages whose ranks an edit from `old_corpus` moves directly: changed
+    pages, and pages they linked to before or link to now. If the
+    number of pages changed enough to move the rank every page gets
+    from random jumps by more than `threshold`, or a page gained or
+    lost all of its links (so the rank it spreads over every page
+    moved), that is all of them.
+    """
+    if old_corpus and (1 - damping_factor) * abs(1 / len(old_corpus) - 1 / len(graph)) > threshold:
+        return range(len(graph))
+
+    changed = corpus_changes(old_corpus, new_corpus)
+    for page in changed:
+        # Including pages added or removed with no links
+        was_dangling = page in old_corpus and not old_corpus[page]
+        is_dangling = page in new_corpus and not new_corpus[page]
+        if was_dangling != is_dangling:
+            return range(len(graph))
+
+    active = set()
+    for page in changed:
+        for linked in (page, *old_corpus.get(page, ()), *new_corpus.get(page, ())):
+            if linked in graph.index:
+                active.add(graph.index[linked])
+    return active
+
+
+def update_pagerank(old_corpus, old_ranks, new_corpus, damping_factor,
+                    threshold=0.001, stats=None):
+    """
+    Return PageRank values for `new_corpus`, a dict of page name to rank,
+    given `old_ranks` computed for `old_corpus`.
+
+    The old ranks are the starting point, and only the pages around
+    those that changed are recomputed, spreading outwards only as far
+    as ranks keep moving by more than `threshold`.
+    """
+    graph = LinkGraph.from_corpus(new_corpus)
+    if len(graph) == 0:
+        raise ValueError("No pages in corpus")
+    ranks = warm_start(graph, old_ranks)
+    active = affected_pages(graph, old_corpus, new_corpus, damping_factor, threshold)
+    ranks = converge_region(graph, damping_factor, ranks, active, threshold, stats)
+    return dict(zip(graph.pages, ranks))
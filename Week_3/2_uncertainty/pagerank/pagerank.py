@@ -1,3 +1,4 @@
+import math
 import os
 import random
 import re
@@ -48,55 +49,103 @@ def crawl(directory):
     return pages
 
 
-def transition_model(corpus, page, damping_factor):
+class TransitionModel():
     """
-    Return a probability distribution over which page to visit next,
-    given a current page.
-
-    With probability `damping_factor`, choose a link at random
-    linked to by `page`. With probability `1 - damping_factor`, choose
-    a link at random chosen from all pages in the corpus.
+    The random surfer's transition model for a corpus, built once so
+    that it does not have to be recomputed for every page visited or
+    every iteration: the number of links on each page, the pages with
+    no links, and, for each page, the pages that link to it.
     """
 
-    # Establish initial variables
-    # Number of pages linked to the specified one is the number of items in the value of the relevant corpus key
-    number_pages_linked = len(corpus[page])
-    # Number of total pages is number of items in corpus
-    number_pages = len(corpus)
-    linked_pages = corpus[page]
-    # Initialise a dict in which to place relevant probabilities
-    probability_dict = {}
-
+    def __init__(self, corpus, damping_factor):
+        # If number of pages in corpus is 0 then raise error
+        if len(corpus) == 0:
+            raise ValueError("No pages in corpus")
+        self.corpus = corpus
+        self.damping_factor = damping_factor
+        self.pages = list(corpus.keys())
+        self.number_pages = len(self.pages)
+        # Links to pages in the corpus as lists, so that a random one can be chosen directly
+        self.links = {page: [link for link in corpus[page] if link in corpus] for page in self.pages}
+        # Links to pages outside the corpus still count, as the rank they pass on is lost
+        self.number_links = {page: len(corpus[page]) for page in self.pages}
+        # Pages with no links are treated as linking to every page
+        self.dangling = [page for page in self.pages if self.number_links[page] == 0]
+        # For each page, the pages which link to it
+        self.linked_from = {page: [] for page in self.pages}
+        for page in self.pages:
+            for link in self.links[page]:
+                self.linked_from[link].append(page)
+
+    def distribution(self, page):
+        """
+        Return a probability distribution over which page to visit next,
+        given a current page, as transition_model does.
+        """
+        return page_distribution(self.pages, self.corpus[page], self.damping_factor)
+
+    def next_page(self, page):
+        """
+        Return a page chosen at random from the distribution given by
+        distribution(page), without building it.
+        """
+        number_pages_linked = self.number_links[page]
+        if number_pages_linked == 0:
+            return random.choice(self.pages)
+
+        # Total probability of following a link, and of jumping to a page which is not linked
+        # (a link leaving the corpus cannot be followed, so is left out of both)
+        number_pages_followed = len(self.links[page])
+        weight_linked = self.damping_factor * number_pages_followed / number_pages_linked
+        weight_not_linked = (1 - self.damping_factor) * (self.number_pages - number_pages_followed) / self.number_pages
+        if random.random() * (weight_linked + weight_not_linked) < weight_linked:
+            return random.choice(self.links[page])
+
+        # Choose uniformly among the pages which are not linked, trying again on a linked one
+        while True:
+            choice = random.choice(self.pages)
+            if choice not in self.corpus[page]:
+                return choice
+
+
+def page_distribution(pages, linked_pages, damping_factor):
+    """
+    Return a probability distribution over `pages` for the next page to
+    visit from a page linking to `linked_pages`. Links to pages not in
+    `pages` count towards the number of links, but are not visited.
+    """
     # If number of pages in corpus is 0 then raise error
-    if number_pages == 0:
+    if len(pages) == 0:
         raise ValueError("No pages in corpus")
 
-    # Different probabilities based on if a page is linked to the current one or not
-    if number_pages_linked > 0:
-        probability_linked = damping_factor / number_pages_linked
-        probability_not_linked = (1 - damping_factor) / number_pages
     # If the number of linked pages is 0 then a uniform probability of 1 divided by the number of pages
-    elif number_pages_linked == 0:
-        probability = 1/number_pages
-        # Iterate through the keys and assign the calculated probability
-        for key in corpus:
-            probability_dict[key] = probability
-        # Return the dict with all keys and probabilities (when no linked pages)
-        return probability_dict
-
-    # Iterate through keys and assign correct calculated probability
-    for key in corpus:
-        # If the page is linked to the current one then give it the correct probability
-        if key in linked_pages:
+    if len(linked_pages) == 0:
+        return dict.fromkeys(pages, 1 / len(pages))
+
+    # Every page gets the probability of not being linked, then linked pages are corrected
+    probability_dict = dict.fromkeys(pages, (1 - damping_factor) / len(pages))
+    probability_linked = damping_factor / len(linked_pages)
+    for key in linked_pages:
+        if key in probability_dict:
             probability_dict[key] = probability_linked
-        # If the page is not linked to the current one then give it a different probability
-        else:
-            probability_dict[key] = probability_not_linked
-
-    # Return the proability dict
     return probability_dict
 
 
+def transition_model(corpus, page, damping_factor):
+    """
+    Return a probability distribution over which page to visit next,
+    given a current page.
+
+    With probability `damping_factor`, choose a link at random
+    linked to by `page`. With probability `1 - damping_factor`, choose
+    a link at random chosen from all pages in the corpus.
+
+    To visit many pages of the same corpus, build a TransitionModel
+    once and use it instead.
+    """
+    return page_distribution(corpus.keys(), corpus[page], damping_factor)
+
+
 def sample_pagerank(corpus, damping_factor, n):
     """
     Return PageRank values for each page by sampling `n` pages
@@ -107,18 +156,17 @@ def sample_pagerank(corpus, damping_factor, n):
     PageRank values should sum to 1.
     """
 
+    # Build the transition model once, rather than for every page visited
+    model = TransitionModel(corpus, damping_factor)
     # Create a list of all pages
-    list_of_pages = list(corpus.keys())
+    list_of_pages = model.pages
     # Randomly select a page to start on
     current_page = random.choice(list_of_pages)
 
     # Intialise a dict for all the visited pages
-    visited_pages = {}
-    # For each page in the list of all pages, add it to the dict
     # With a value of 0
     # (the value representing the number of time the page was visited in the sample)
-    for p in list_of_pages:
-        visited_pages.update({p : 0})
+    visited_pages = dict.fromkeys(list_of_pages, 0)
 
     # Initialise count of the number of pages visited
     nr_pages_visited = 0
@@ -129,23 +177,8 @@ def sample_pagerank(corpus, damping_factor, n):
         nr_pages_visited += 1
         # Increase the value of the current page in the visited pages dict
         visited_pages[current_page] += 1
-        # Using trasition_model func. get the probability distribution of other pages from the current page
-        distribution = transition_model(corpus, current_page, damping_factor)
-        # Randomly select a value to create a 'first past the post' style randomiser
-        random_value = random.random() * sum(distribution.values())
-        # Start at 0
-        sum_probabilities = 0.0
-        # Iterate through the distribution
-        for page, probility in distribution.items():
-            # Add the probabilities, continuously
-            sum_probabilities += probility
-            # When the added probabilities are over the randomly selected values
-            # Then select that specific page as the random next page to go to
-            if sum_probabilities >= random_value:
-                # Set the randomly selected page as the current page
-                current_page = page
-                # Restart the loop
-                break
+        # Randomly select the next page from the transition model of the current page
+        current_page = model.next_page(current_page)
 
     # Initialise a dict for page rank
     page_rank = {}
@@ -161,7 +194,8 @@ def sample_pagerank(corpus, damping_factor, n):
     return page_rank
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, threshold=0.001, norm="max",
+                     max_iterations=None, stats=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -169,19 +203,33 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    Convergence is when the change in PageRank values over one
+    iteration is no more than `threshold`, measured by `norm`: the
+    largest change ("max"), the sum of changes ("l1") or the Euclidean
+    length of the changes ("l2"). At most `max_iterations` iterations
+    are made, if given. If `stats` is a dict, the number of iterations,
+    the change in each ("residuals") and whether the threshold was
+    reached are recorded in it.
     """
+    if norm not in ("max", "l1", "l2"):
+        raise ValueError(f"Unknown norm: {norm}")
 
+    # Build the transition model once: links into each page and pages with no links
+    model = TransitionModel(corpus, damping_factor)
     # Calculate the number of pages in the corpus
-    number_pages = len(corpus)
+    number_pages = model.number_pages
     # Get a list of the pages from the keys of the corpus
-    pages = list(corpus.keys())
+    pages = model.pages
+    number_links = model.number_links
+    linked_from = model.linked_from
     # Initialise a page rank dict
     page_rank = {}
-    # Set the initial value of the highest calculated change in page rank as 1
+    # Set the initial value of the calculated change in page rank as infinite
     # (This is only to start the while loop)
-    highest_page_rank_change = 1
-    # Set the threshold of acceptible maximum change in page rank as 0.001
-    threshold = 0.001
+    page_rank_change = math.inf
+    # Keep the change made by every iteration
+    residuals = []
 
     # As a starting point to page rank:
     # Set the page rank of every page to a uniform probability of 1/total number of pages in corpus
@@ -189,38 +237,44 @@ def iterate_pagerank(corpus, damping_factor):
         # Add the page and value to the page rank dict
         page_rank[page] = (1.0/number_pages)
 
-    # A while loop which only ends when the highest change in page rank fall below a specified value
-    while highest_page_rank_change > threshold:
-        # Set the highest change to 0 (so that the loop does not get stuck)
-        highest_page_rank_change = 0
+    # A while loop which only ends when the change in page rank falls below the threshold
+    while page_rank_change > threshold:
+        # Or when the maximum number of iterations has been made
+        if max_iterations is not None and len(residuals) >= max_iterations:
+            break
+        # Set the change to 0 (so that the loop does not get stuck)
+        page_rank_change = 0
         # Initialise a new ranks dic
         # (so that the page rank dict is not mutated during the loop)
         new_ranks = {}
+        # Pages with no links are treated as connecting to all, so share their rank among every page
+        dangling_share = sum(page_rank[possible_link] for possible_link in model.dangling) / number_pages
         # Iterate through each page
         for page in pages:
-            # For second half of formula
-            sum_of_links = 0
-            # Iterate through pages and see if they link to current one
-            for possible_link in pages:
-                # Treat pages with no links as connecting to all
-                number_links = len(corpus[possible_link])
-                if number_links == 0:
-                    number_links = number_pages
-                    links_to_page = True
-                else:
-                    # True if possible link is listed in values of corpus key
-                    links_to_page = (page in corpus[possible_link])
-
-                if links_to_page:
-                    sum_of_links += (page_rank[possible_link] / number_links)
+            # For second half of formula, only the pages which link to the current one
+            sum_of_links = dangling_share
+            for possible_link in linked_from[page]:
+                sum_of_links += (page_rank[possible_link] / number_links[possible_link])
 
             page_rank_current = ((1 - damping_factor) / number_pages) + damping_factor * sum_of_links
             new_ranks[page] = page_rank_current
             page_rank_change_current = abs(page_rank_current - page_rank[page])
-            if highest_page_rank_change < page_rank_change_current:
-                highest_page_rank_change = page_rank_change_current
+            # Combine the changes according to the norm
+            if norm == "max":
+                page_rank_change = max(page_rank_change, page_rank_change_current)
+            elif norm == "l1":
+                page_rank_change += page_rank_change_current
+            else:
+                page_rank_change += page_rank_change_current ** 2
+        if norm == "l2":
+            page_rank_change = math.sqrt(page_rank_change)
+        residuals.append(page_rank_change)
         page_rank = new_ranks
 
+    if stats is not None:
+        stats["iterations"] = len(residuals)
+        stats["residuals"] = residuals
+        stats["converged"] = page_rank_change <= threshold
     return page_rank
 
 if __name__ == "__main__":
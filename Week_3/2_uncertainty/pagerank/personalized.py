@@ -0,0 +1,97 @@
+from sparse import LinkGraph
+
+
+def teleport_vector(graph, weights):
+    """
+    Return the list of probabilities of a random jump landing on each
+    page of `graph`, given a dict of page name to weight (pages not in
+    it have weight 0), such as {page: 1 for page in topic} to jump only
+    to pages on a topic.
+    """
+    vector = [0.0] * len(graph)
+    for page, weight in weights.items():
+        if weight < 0:
+            raise ValueError("Teleport weights cannot be negative")
+        vector[graph.index[page]] += weight
+    total = sum(vector)
+    if total <= 0:
+        raise ValueError("Teleport weights must have a positive total")
+    return [weight / total for weight in vector]
+
+
+def personalized_iterate(graph, damping_factor, teleports, threshold=0.001, stats=None):
+    """
+    Return, for each teleport vector in `teleports`, the list of the
+    personalised PageRank of each page of `graph`: with probability
+    `1 - damping_factor`, and from pages with no links, the random
+    surfer jumps to a page chosen by the teleport vector rather than
+    uniformly.
+
+    Every vector is solved at once: each iteration walks the links of
+    the graph once, carrying a tuple of ranks, one per vector, along
+    each link. Iteration stops when no rank of any vector changes by
+    more than `threshold`. If `stats` is a dict, the number of
+    iterations is recorded in it.
+    """
+    n = len(graph)
+    if n == 0:
+        raise ValueError("No pages in corpus")
+    k = len(teleports)
+    if k == 0:
+        return []
+    offsets = graph.offsets
+    sources = graph.sources
+    out_degree = graph.out_degree
+
+    # Row i holds page i's teleport probability, and its rank, for every vector
+    teleport_rows = list(zip(*teleports))
+    ranks = [(1 / n,) * k] * n
+    zero = (0.0,) * k
+
+    iterations = 0
+    change = 1
+    while change > threshold:
+        iterations += 1
+        share = [tuple(rank / degree for rank in row) if degree else zero
+                 for row, degree in zip(ranks, out_degree)]
+
+        # Rank jumping away, at random or from pages with no links
+        dangling = [sum(column) for column in zip(*(ranks[i] for i in graph.dangling))]
+        jumping = [1 - damping_factor + damping_factor * total
+                   for total in (dangling or zero)]
+
+        new_ranks = []
+        for i in range(n):
+            linking = sources[offsets[i]:offsets[i + 1]]
+            linked = map(sum, zip(*map(share.__getitem__, linking))) if linking else zero
+            new_ranks.append(tuple(
+                jump * teleport + damping_factor * rank
+                for jump, teleport, rank in zip(jumping, teleport_rows[i], linked)
+            ))
+
+        change = max(abs(new - old) for new_row, old_row in zip(new_ranks, ranks)
+                     for new, old in zip(new_row, old_row))
+        ranks = new_ranks
+
+    if stats is not None:
+        stats["iterations"] = iterations
+    return [list(column) for column in zip(*ranks)]
+
+
+def personalized_pagerank(corpus, damping_factor, weights, threshold=0.001):
+    """
+    Return personalised PageRank values for each page, as a dict of page
+    name to rank, for teleport weights given as in teleport_vector.
+    """
+    return batch_personalized_pagerank(corpus, damping_factor, [weights], threshold)[0]
+
+
+def batch_personalized_pagerank(corpus, damping_factor, weights, threshold=0.001):
+    """
+    Return a dict of personalised PageRank values for each dict of
+    teleport weights in `weights`, solving all of them together.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    teleports = [teleport_vector(graph, vector) for vector in weights]
+    return [dict(zip(graph.pages, ranks))
+            for ranks in personalized_iterate(graph, damping_factor, teleports, threshold)]
@@ -0,0 +1,167 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from sparse import LinkGraph
+
+# Graph sampled by a worker process, set once when the worker starts
+worker_graph = None
+
+
+def follow_probabilities(graph, damping_factor):
+    """
+    Return, for each page of `graph`, the probability that the random
+    surfer's next page is chosen from the page's links rather than from
+    the whole corpus: `damping_factor` for a page whose links are all
+    in the corpus, as in the formula iterate_pagerank uses. A link
+    leaving the corpus is replaced by a jump to a page chosen at random,
+    and pages with no links always jump.
+    """
+    link_offsets, _ = graph.outgoing()
+    probabilities = []
+    for i, degree in enumerate(graph.out_degree):
+        linked = link_offsets[i + 1] - link_offsets[i]
+        probabilities.append(damping_factor * linked / degree if linked else 0.0)
+    return probabilities
+
+
+def walk(graph, damping_factor, n, rng=random):
+    """
+    Return a list of how many times a random surfer visits each page of
+    `graph` in `n` samples, starting at a page chosen at random.
+
+    Each step decides directly between following a link and jumping to
+    any page, then picks uniformly among the links or the pages, so a
+    step takes constant time however large the corpus.
+    """
+    pages = len(graph)
+    if pages == 0:
+        raise ValueError("No pages in corpus")
+    link_offsets, links = graph.outgoing()
+    follow = follow_probabilities(graph, damping_factor)
+    uniform = rng.random
+
+    counts = [0] * pages
+    page = int(uniform() * pages)
+    for _ in range(n):
+        counts[page] += 1
+        if uniform() < follow[page]:
+            start = link_offsets[page]
+            page = links[start + int(uniform() * (link_offsets[page + 1] - start))]
+        else:
+            page = int(uniform() * pages)
+    return counts
+
+
+def walk_many(graph, damping_factor, n, walkers=1000, rng=random):
+    """
+    Return a list of how many times each page of `graph` is visited in
+    `n` samples shared among `walkers` random surfers, each starting at
+    a page chosen at random. All surfers are moved one step together,
+    so the loop over steps runs n / walkers times.
+    """
+    pages = len(graph)
+    if pages == 0:
+        raise ValueError("No pages in corpus")
+    link_offsets, links = graph.outgoing()
+    follow = follow_probabilities(graph, damping_factor)
+    linked = [link_offsets[i + 1] - link_offsets[i] for i in range(pages)]
+    uniform = rng.random
+
+    counts = [0] * pages
+    positions = [int(uniform() * pages) for _ in range(min(walkers, n))]
+    remaining = n
+    while remaining > 0:
+        # The last step may need fewer samples than there are surfers
+        if remaining < len(positions):
+            positions = positions[:remaining]
+        for page in positions:
+            counts[page] += 1
+        remaining -= len(positions)
+        positions = [
+            links[link_offsets[page] + int(uniform() * linked[page])]
+            if uniform() < follow[page] else int(uniform() * pages)
+            for page in positions
+        ]
+    return counts
+
+
+def sparse_sample_pagerank(corpus, damping_factor, n, walkers=1, rng=random):
+    """
+    Return PageRank values for each page by sampling `n` pages, like
+    sample_pagerank, with one random surfer or `walkers` surfers at once.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    if walkers == 1:
+        counts = walk(graph, damping_factor, n, rng)
+    else:
+        counts = walk_many(graph, damping_factor, n, walkers, rng)
+    return {page: count / n for page, count in zip(graph.pages, counts)}
+
+
+def sample_chunk(graph, damping_factor, n, seed, walkers=1):
+    """
+    Return visit counts for `n` samples drawn with a random number
+    generator of their own, seeded with `seed`.
+    """
+    rng = random.Random(seed)
+    if walkers == 1:
+        return walk(graph, damping_factor, n, rng)
+    return walk_many(graph, damping_factor, n, walkers, rng)
+
+
+def set_worker_graph(graph):
+    global worker_graph
+    worker_graph = graph
+
+
+def sample_worker_chunk(damping_factor, n, seed, walkers):
+    return sample_chunk(worker_graph, damping_factor, n, seed, walkers)
+
+
+def parallel_walk(graph, damping_factor, n, processes=None, seed=0,
+                  chunks=16, walkers=1):
+    """
+    Return visit counts for `n` samples split into `chunks` independent
+    walks, run on a pool of `processes` worker processes (all available
+    CPUs by default; 1 samples in this process).
+
+    Chunk i is seeded with "{seed}/{i}", so the counts depend only on
+    `seed` and `chunks`, and not on how many processes share the work.
+    The graph is sent to each worker once, when it starts.
+    """
+    if len(graph) == 0:
+        raise ValueError("No pages in corpus")
+    chunks = max(1, min(chunks, n))
+    sizes = [n // chunks + (i < n % chunks) for i in range(chunks)]
+    seeds = [f"{seed}/{i}" for i in range(chunks)]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, chunks)
+
+    if processes <= 1:
+        results = [sample_chunk(graph, damping_factor, size, chunk_seed, walkers)
+                   for size, chunk_seed in zip(sizes, seeds)]
+    else:
+        # Make sure the out-links are built once here, not in every worker
+        graph.outgoing()
+        with ProcessPoolExecutor(max_workers=processes, initializer=set_worker_graph,
+                                 initargs=(graph,)) as executor:
+            results = list(executor.map(sample_worker_chunk,
+                                        [damping_factor] * chunks, sizes, seeds,
+                                        [walkers] * chunks))
+
+    # Merge the visit counts of every chunk
+    return [sum(counts) for counts in zip(*results)]
+
+
+def parallel_sample_pagerank(corpus, damping_factor, n, processes=None, seed=0,
+                             chunks=16, walkers=1):
+    """
+    Return PageRank values for each page by sampling `n` pages, spread
+    across worker processes as in parallel_walk.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    counts = parallel_walk(graph, damping_factor, n, processes, seed, chunks, walkers)
+    return {page: count / n for page, count in zip(graph.pages, counts)}
@@ -0,0 +1,290 @@
+import array
+import math
+import operator
+
+
+class LinkGraph():
+    """
+    A corpus as a sparse link matrix. Pages are numbered in corpus
+    order, and the pages linking to page i are
+    sources[offsets[i]:offsets[i + 1]], in ascending order: the
+    compressed sparse row form of the transposed link matrix.
+    """
+
+    def __init__(self, pages, offsets, sources, out_degree, link_offsets=None, links=None):
+        self.pages = pages
+        self.index = {page: i for i, page in enumerate(pages)}
+        self.offsets = offsets
+        self.sources = sources
+
+        # Number of links on each page, counting any to pages outside
+        # the corpus, as iterate_pagerank does
+        self.out_degree = out_degree
+
+        # Pages with no links, treated as linking to every page
+        self.dangling = array.array("q", (i for i, degree in enumerate(out_degree)
+                                          if degree == 0))
+
+        # Links from each page in the same form, built when first needed
+        # if not given
+        self.link_offsets = link_offsets
+        self.links = links
+
+    def __len__(self):
+        return len(self.pages)
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build the link matrix of a corpus as returned by crawl.
+        """
+        pages = list(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+
+        incoming = [[] for _ in pages]
+        out_degree = array.array("q")
+        link_offsets = array.array("q", [0])
+        links = array.array("q")
+        for i, page in enumerate(pages):
+            page_links = corpus[page]
+            out_degree.append(len(page_links))
+            links.extend(index[link] for link in page_links if link in index)
+            link_offsets.append(len(links))
+            for j in links[link_offsets[i]:]:
+                incoming[j].append(i)
+
+        # Pages were visited in order, so each list is already sorted
+        offsets = array.array("q", [0])
+        sources = array.array("q")
+        for page_sources in incoming:
+            sources.extend(page_sources)
+            offsets.append(len(sources))
+        return cls(pages, offsets, sources, out_degree, link_offsets, links)
+
+    def outgoing(self):
+        """
+        Return (link_offsets, links), where the pages in the corpus that
+        page i links to are links[link_offsets[i]:link_offsets[i + 1]].
+        """
+        if self.links is None:
+            outgoing = [[] for _ in self.pages]
+            offsets = self.offsets
+            for i in range(len(self.pages)):
+                for source in self.sources[offsets[i]:offsets[i + 1]]:
+                    outgoing[source].append(i)
+            self.link_offsets = array.array("q", [0])
+            self.links = array.array("q")
+            for links in outgoing:
+                self.links.extend(links)
+                self.link_offsets.append(len(self.links))
+        return self.link_offsets, self.links
+
+
+def distance(ranks, other, norm="max"):
+    """
+    Return the distance between two lists of ranks: the largest
+    difference ("max"), the sum of differences ("l1"), or the Euclidean
+    distance ("l2").
+    """
+    changes = map(abs, map(operator.sub, ranks, other))
+    if norm == "max":
+        return max(changes)
+    if norm == "l1":
+        return sum(changes)
+    if norm == "l2":
+        return math.sqrt(sum(change * change for change in changes))
+    raise ValueError(f"Unknown norm: {norm}")
+
+
+def jacobi_step(graph, damping_factor, ranks):
+    """
+    Return the ranks after applying the PageRank formula to every page
+    at once. A page's rank is gathered from the pages linking to it,
+    and the rank spread evenly by pages with no links is added to
+    every page at once.
+    """
+    n = len(graph)
+    offsets = graph.offsets
+    sources = graph.sources
+
+    # Rank passed along each link of every page
+    share = [rank / degree if degree else 0.0
+             for rank, degree in zip(ranks, graph.out_degree)]
+    spread = sum(ranks[i] for i in graph.dangling) / n
+    teleport = (1 - damping_factor) / n + damping_factor * spread
+
+    return [
+        teleport + damping_factor * sum(map(share.__getitem__,
+                                            sources[offsets[i]:offsets[i + 1]]))
+        for i in range(n)
+    ]
+
+
+def gauss_seidel_step(graph, damping_factor, ranks):
+    """
+    Return the ranks after applying the PageRank formula to each page
+    in turn, each using the ranks already updated in the same sweep.
+
+    The sweep does not keep the total rank as a step applied to every
+    page at once would, and that error fades slowly, so the ranks are
+    scaled to the total such a step would give.
+    """
+    n = len(graph)
+    offsets = graph.offsets
+    sources = graph.sources
+    out_degree = graph.out_degree
+    link_offsets, _ = graph.outgoing()
+
+    ranks = list(ranks)
+    share = [rank / degree if degree else 0.0
+             for rank, degree in zip(ranks, out_degree)]
+    spread = sum(ranks[i] for i in graph.dangling) / n
+
+    # Rank kept by the whole corpus, less any passed along links leaving it
+    total = (1 - damping_factor) + damping_factor * (
+        spread * n + sum(share[i] * (link_offsets[i + 1] - link_offsets[i])
+                         for i in range(n))
+    )
+
+    base = (1 - damping_factor) / n
+    for i in range(n):
+        linked = sum(map(share.__getitem__, sources[offsets[i]:offsets[i + 1]]))
+        rank = base + damping_factor * (spread + linked)
+        if out_degree[i]:
+            share[i] = rank / out_degree[i]
+        else:
+            spread += (rank - ranks[i]) / n
+        ranks[i] = rank
+
+    scale = total / sum(ranks)
+    return [rank * scale for rank in ranks]
+
+
+def aitken(history):
+    """
+    Return Aitken's delta-squared extrapolation of each rank from its
+    last three iterates, keeping the latest rank wherever the
+    extrapolation is undefined or negative.
+    """
+    extrapolated = []
+    for x0, x1, x2 in zip(*history[-3:]):
+        denominator = x2 - 2 * x1 + x0
+        rank = x2 - (x2 - x1) ** 2 / denominator if denominator else x2
+        extrapolated.append(rank if rank >= 0 else x2)
+    return extrapolated
+
+
+def quadratic(history):
+    """
+    Return the quadratic extrapolation of Kamvar et al. from the last
+    four iterates, which assumes the error lies mostly along the two
+    slowest-decaying directions and removes it by least squares.
+    Negative ranks are set to 0.
+    """
+    x0, x1, x2, x3 = history[-4:]
+    y1 = [a - b for a, b in zip(x1, x0)]
+    y2 = [a - b for a, b in zip(x2, x0)]
+    y3 = [a - b for a, b in zip(x3, x0)]
+
+    # Least squares solution of [y1 y2] (g1, g2) = -y3
+    a11 = sum(a * a for a in y1)
+    a12 = sum(a * b for a, b in zip(y1, y2))
+    a22 = sum(b * b for b in y2)
+    b1 = -sum(a * c for a, c in zip(y1, y3))
+    b2 = -sum(b * c for b, c in zip(y2, y3))
+    determinant = a11 * a22 - a12 * a12
+    if not determinant:
+        return list(x3)
+    g1 = (b1 * a22 - b2 * a12) / determinant
+    g2 = (a11 * b2 - a12 * b1) / determinant
+
+    # Each iterate is the fixed point plus errors the combination
+    # cancels, so dividing by the sum of its weights leaves the fixed point
+    beta0, beta1, beta2 = g1 + g2 + 1, g2 + 1, 1
+    weight = beta0 + beta1 + beta2
+    if not weight:
+        return list(x3)
+    return [max((beta0 * a + beta1 * b + beta2 * c) / weight, 0.0)
+            for a, b, c in zip(x1, x2, x3)]
+
+
+# Ways to move from one iterate to the next, and to extrapolate from
+# the last few (with the number of iterates each needs)
+STEPS = {
+    "jacobi": jacobi_step,
+    "gauss-seidel": gauss_seidel_step
+}
+EXTRAPOLATIONS = {
+    "aitken": (aitken, 3),
+    "quadratic": (quadratic, 4)
+}
+
+
+def power_iterate(graph, damping_factor, threshold=0.001, ranks=None, stats=None,
+                  norm="max", max_iterations=None, method="jacobi",
+                  extrapolation=None, extrapolate_every=10):
+    """
+    Return a list of the PageRank of each page of `graph`, starting
+    from `ranks` (uniform by default) and applying the PageRank formula
+    until the ranks change by no more than `threshold`, measured in
+    `norm` (see distance), or `max_iterations` have been made.
+
+    `method` is "jacobi" to update every page at once, or
+    "gauss-seidel" to update pages in turn from the newest ranks, which
+    usually needs fewer iterations. With `extrapolation` "aitken" or
+    "quadratic", every `extrapolate_every` iterations the ranks are
+    replaced by an extrapolation of the last few iterates.
+
+    Each iteration takes time proportional to the number of pages plus
+    the number of links. If `stats` is a dict, the number of iterations
+    and of page updates, the change made by each iteration
+    ("residuals") and whether the threshold was reached are recorded
+    in it.
+    """
+    n = len(graph)
+    if n == 0:
+        raise ValueError("No pages in corpus")
+    if method not in STEPS:
+        raise ValueError(f"Unknown method: {method}")
+    if extrapolation is not None and extrapolation not in EXTRAPOLATIONS:
+        raise ValueError(f"Unknown extrapolation: {extrapolation}")
+    step = STEPS[method]
+
+    ranks = [1 / n] * n if ranks is None else list(ranks)
+    history = [ranks]
+    residuals = []
+    change = math.inf
+    while change > threshold:
+        if max_iterations is not None and len(residuals) >= max_iterations:
+            break
+        new_ranks = step(graph, damping_factor, ranks)
+        change = distance(new_ranks, ranks, norm)
+        residuals.append(change)
+        ranks = new_ranks
+
+        if extrapolation is not None and change > threshold:
+            extrapolate, needed = EXTRAPOLATIONS[extrapolation]
+            history.append(ranks)
+            if len(residuals) % extrapolate_every == 0 and len(history) >= needed:
+                ranks = extrapolate(history)
+                history = [ranks]
+            else:
+                del history[:-needed]
+
+    if stats is not None:
+        stats["iterations"] = len(residuals)
+        stats["updates"] = len(residuals) * n
+        stats["residuals"] = residuals
+        stats["converged"] = change <= threshold
+    return ranks
+
+
+def sparse_pagerank(corpus, damping_factor, threshold=0.001, **options):
+    """
+    Return the same PageRank values as iterate_pagerank, as a dict of
+    page name to rank, using the sparse link matrix of the corpus.
+    Other options are passed on to power_iterate.
+    """
+    graph = LinkGraph.from_corpus(corpus)
+    return dict(zip(graph.pages, power_iterate(graph, damping_factor, threshold,
+                                               **options)))